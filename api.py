@@ -1,28 +1,115 @@
 # api.py
-import os, hashlib
+import os, time, asyncio, base64, hashlib, json
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from email.utils import format_datetime
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Response, Request, HTTPException
-from fastapi.responses import PlainTextResponse
-from feedgen.feed import FeedGenerator
+from fastapi import FastAPI, Query, Response, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
+from src.modules.cache import CachedFeed, FragmentCache, HeadCache, RenderCache, Scope
+from src.modules.metrics import CONTENT_TYPE, REGISTRY, Sample
+from src.modules.compress import IDENTITY, SUPPORTED, compress, compressor, negotiate
+from src.modules.notify import RunBroker, RunNotice
+from src.modules.render import MEDIA_TYPES, atom_chunks, item_fragment, json_chunks, rss_chunks
+from src.modules.tokens import TokenCache
 from src.modules.pgdao import (
-    rss_key_get,
-    rss_key_touch,
-    rss_head_aggregate,
-    rss_select_items,
+    RUNS_CHANNEL,
+    listen_async,
+    open_async_pool,
+    close_async_pool,
+    rss_head_summary_async,
+    rss_select_items_async,
+    rss_select_items_since_async,
+    rss_latest_cursor_async,
 )
 
 load_dotenv()
 
 APP_TITLE = os.getenv("APP_TITLE", "Personalized RSS")
 APP_LINK = os.getenv("APP_LINK", "https://example.com")
+# Public origin of this API (scheme://host[/prefix]); feed ids and self links
+# are built from it, never from the request URL
+_DOMAIN = os.getenv("DOMAIN_NAME", "")
+PUBLIC_URL = (os.getenv("RSS_PUBLIC_URL") or (f"https://{_DOMAIN}" if _DOMAIN else APP_LINK)).rstrip("/")
 MAX_LIMIT = int(os.getenv("RSS_MAX_LIMIT", "500"))
+MAX_QUERY_LENGTH = int(os.getenv("RSS_MAX_QUERY_LENGTH", "200"))
+FEED_DESCRIPTION = "Merged items from FEED_DATA"
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RSS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RENDER_CACHE_TTL_SECONDS = float(os.getenv("RSS_CACHE_TTL_SECONDS", "3600"))
+FRAGMENT_CACHE_MAX_BYTES = int(os.getenv("RSS_FRAGMENT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+KEY_CACHE_TTL_SECONDS = float(os.getenv("RSS_KEY_CACHE_TTL_SECONDS", "30"))
+KEY_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("RSS_KEY_NEGATIVE_TTL_SECONDS", "10"))
+KEY_CACHE_MAX_ENTRIES = int(os.getenv("RSS_KEY_CACHE_MAX_ENTRIES", "10000"))
+KEY_TOUCH_FLUSH_SECONDS = float(os.getenv("RSS_KEY_TOUCH_FLUSH_SECONDS", "15"))
+HEAD_CACHE_TTL_SECONDS = float(os.getenv("RSS_HEAD_CACHE_TTL_SECONDS", "300"))
+SSE_PING_SECONDS = float(os.getenv("RSS_SSE_PING_SECONDS", "15"))
 
-app = FastAPI(title="RSS API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_async_pool()
+    flusher = asyncio.create_task(token_cache.run_flusher(KEY_TOUCH_FLUSH_SECONDS))
+    listener = asyncio.create_task(_listen_for_runs())
+    try:
+        yield
+    finally:
+        listener.cancel()
+        flusher.cancel()
+        try:
+            await token_cache.flush()
+        finally:
+            await close_async_pool()
+
+
+app = FastAPI(title="RSS API", version="1.0.0", lifespan=lifespan)
+
+# Head-summary rows per scope; invalidated by the worker's run NOTIFY
+head_cache = HeadCache(HEAD_CACHE_TTL_SECONDS)
+
+# Fan-out of run notifications to /rss/{token}/events subscribers
+run_broker = RunBroker()
+
+# Rendered RSS bytes keyed by ETag; a new run/hash yields a new ETag and misses.
+render_cache = RenderCache(RENDER_CACHE_MAX_BYTES, RENDER_CACHE_TTL_SECONDS)
+
+# Rendered items keyed by (item, run_id), shared by every scope that lists them;
+# a render-cache miss only renders items it hasn't seen at their current version.
+fragment_cache = FragmentCache(FRAGMENT_CACHE_MAX_BYTES)
+
+# Token rows (and misses) for a bounded window; last_used_at is written behind.
+token_cache = TokenCache(
+    KEY_CACHE_TTL_SECONDS, KEY_CACHE_NEGATIVE_TTL_SECONDS, KEY_CACHE_MAX_ENTRIES
+)
+
+
+def _apply_run_notice(notice: RunNotice) -> None:
+    head_cache.invalidate(notice.affects)
+    render_cache.invalidate(notice.affects)
+    run_broker.publish(notice)
+
+
+async def _listen_for_runs() -> None:
+    """
+    Hold one LISTEN connection for worker run notifications, reconnecting with
+    backoff. Head summaries are dropped whenever LISTEN (re)starts, since
+    notifications sent while disconnected are lost.
+    """
+    delay = 1.0
+    while True:
+        try:
+            async for payload in listen_async(RUNS_CHANNEL, on_listen=head_cache.clear):
+                delay = 1.0
+                _apply_run_notice(RunNotice.from_payload(payload))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            print(f"⚠️ LISTEN {RUNS_CHANNEL} dropped: {exc}")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 60.0)
 
 
 def _to_utc(dt: Optional[datetime]) -> Optional[datetime]:
@@ -52,79 +139,419 @@ def _etag(
     return f"\"{hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()}\""
 
 
+def _variant_etag(etag: str, coding: str) -> str:
+    # Each content-coding is its own representation and gets its own strong ETag
+    return etag if coding == IDENTITY else f"{etag[:-1]}-{coding}\""
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    True when If-None-Match names any coding variant of etag (or is "*").
+    """
+    if not if_none_match:
+        return False
+    variants = {etag, *(_variant_etag(etag, c) for c in SUPPORTED)}
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag == "*" or tag in variants:
+            return True
+    return False
+
+
 def _http_last_modified(dt: Optional[datetime]) -> str:
     return format_datetime(_to_utc(dt) or datetime.now(timezone.utc), usegmt=True)
 
 
-def _feed_title(base: str, category: Optional[str], feed_id: Optional[str]) -> str:
+def _encode_cursor(published_dt: datetime, item_id: int) -> str:
+    raw = f"{_to_utc(published_dt).isoformat()}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        dt_s, id_s = raw.split("|")
+        return _to_utc(datetime.fromisoformat(dt_s)), int(id_s)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _encode_since_cursor(run_id: int, item_id: int) -> str:
+    raw = f"{run_id}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode().rstrip("=")
+
+
+def _decode_since_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    (run_id, id) of the last item a client has seen. Since cursors follow
+    ingest order, so items stored later with an older published date, and
+    items updated in a later run, still come after them.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        run_s, id_s = raw.split("|")
+        return int(run_s), int(id_s)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _search_query(q: Optional[str], row: Dict[str, Any]) -> Optional[str]:
+    """
+    The request's q= if given, else the token's stored query (like limit /
+    limit_default). Blank means no search.
+    """
+    query = (q if q is not None else row.get("query") or "").strip()
+    if len(query) > MAX_QUERY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"q is limited to {MAX_QUERY_LENGTH} characters")
+    return query or None
+
+
+def _feed_title(base: str, category: Optional[str], feed_id: Optional[str], query: Optional[str] = None) -> str:
     if feed_id:
-        return f"{base} · feed:{feed_id}"
-    if category:
-        return f"{base} · category:{category}"
-    return base
+        title = f"{base} · feed:{feed_id}"
+    elif category:
+        title = f"{base} · category:{category}"
+    else:
+        title = base
+    return f"{title} · search:{query}" if query else title
+
+
+def _feed_url(token: str, fmt: str) -> str:
+    """
+    Stable URL of a token's feed: the Atom id / self link and JSON Feed
+    feed_url stay the same across pages, queries and proxies.
+    """
+    url = f"{PUBLIC_URL}/rss/{token}"
+    return url if fmt == "rss" else f"{url}?format={fmt}"
+
+
+def _render_chunks(
+    fmt: str,
+    feed_url: str,
+    category: Optional[str],
+    feed_id: Optional[str],
+    query: Optional[str],
+    max_pub: Optional[datetime],
+    items: List[Dict[str, Any]],
+    full: bool = False,
+) -> Iterator[bytes]:
+    title = _feed_title(APP_TITLE, category, feed_id, query)
+    variant = _fragment_variant(full)
+    if fmt == "atom":
+        return atom_chunks(
+            feed_url=feed_url, title=title, link=APP_LINK, description=FEED_DESCRIPTION,
+            last_build=max_pub, rows=items, fragments=fragment_cache, variant=variant,
+        )
+    if fmt == "json":
+        return json_chunks(
+            feed_url=feed_url, title=title, link=APP_LINK, description=FEED_DESCRIPTION,
+            rows=items, fragments=fragment_cache, variant=variant,
+        )
+    return rss_chunks(
+        title=title, link=APP_LINK, description=FEED_DESCRIPTION,
+        last_build=max_pub, rows=items, fragments=fragment_cache, variant=variant,
+    )
+
+
+def _fragment_variant(full: bool) -> str:
+    # full_content rows carry a different summary for the same item version
+    return "full" if full else ""
+
+
+def _stream_into_cache(
+    etag: str,
+    scope: Scope,
+    coding: str,
+    chunks: Iterator[bytes],
+    headers: Dict[str, str],
+) -> Iterator[bytes]:
+    """
+    Pass chunks through to the client (compressed on the fly when negotiated)
+    and cache the identity body plus the encoded variant once it completes.
+    """
+    raw: List[bytes] = []
+    encoded: List[bytes] = []
+    comp = compressor(coding) if coding != IDENTITY else None
+    for chunk in chunks:
+        raw.append(chunk)
+        if comp is None:
+            yield chunk
+            continue
+        out = comp.compress(chunk)
+        if out:
+            encoded.append(out)
+            yield out
+    if comp is not None:
+        tail = comp.flush()
+        encoded.append(tail)
+        yield tail
+        render_cache.put(
+            _variant_etag(etag, coding),
+            CachedFeed(body=b"".join(encoded), headers=headers, scope=scope),
+        )
+    render_cache.put(etag, CachedFeed(body=b"".join(raw), headers=headers, scope=scope))
+
+
+def _cursor_headers(
+    items: List[Dict[str, Any]],
+    lim: int,
+    since: Optional[str],
+    since_key: Optional[Tuple[int, int]],
+) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    if items:
+        headers["X-Since-Cursor"] = _encode_since_cursor(*max((r["run_id"], r["id"]) for r in items))
+        if not since_key and len(items) >= lim:
+            oldest = items[-1]
+            headers["X-Next-Cursor"] = _encode_cursor(oldest["published_dt"], oldest["id"])
+    elif since:
+        headers["X-Since-Cursor"] = since
+    return headers
+
+
+async def _head_for(category: Optional[str], feed_id: Optional[str]) -> Dict[str, Any]:
+    scope = (category, feed_id)
+    head = head_cache.get(scope)
+    if head is None:
+        generation = head_cache.generation
+        head = await rss_head_summary_async(category, feed_id)
+        head_cache.put(scope, head, generation)
+    return head
 
 
 @app.get("/rss/{token}", response_class=PlainTextResponse)
-def rss_by_token(token: str, request: Request, limit: Optional[int] = None):
-    row = rss_key_get(token)
+async def rss_by_token(
+    token: str,
+    request: Request,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    since: Optional[str] = None,
+    q: Optional[str] = None,
+    fmt: str = Query("rss", alias="format"),
+):
+    """
+    Items for the token's scope as RSS (default), Atom or JSON Feed.
+
+    `before` pages backwards from an X-Next-Cursor; `since` returns only items
+    stored or updated after an X-Since-Cursor (the earliest stored first if
+    more than `limit`), whatever their published date.
+    `q` keeps items whose title or full summary match a web-search style query
+    (`agents -crypto`, `"large language"`, `llm or agents`); without it the
+    token's stored query applies, and `q=` (empty) turns that off.
+    Long summaries are shortened to an excerpt unless the token has
+    full_content.
+    """
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be rss, atom or json")
+    if before and since:
+        raise HTTPException(status_code=400, detail="Use either before or since, not both")
+    before_key = _decode_cursor(before) if before else None
+    since_key = _decode_since_cursor(since) if since else None
+
+    row = await token_cache.get(token)
     if not row:
         raise HTTPException(status_code=403, detail="Invalid token")
 
     category = row.get("category")
     feed_id = row.get("feed_id")
     lim = min(max(1, limit or row.get("limit_default", 100)), MAX_LIMIT)
+    query = _search_query(q, row)
+    full = bool(row.get("full_content"))
 
-    agg = rss_head_aggregate(category, feed_id)
+    agg = await _head_for(category, feed_id)
     max_pub = _to_utc(agg.get("max_published_dt"))
+    # Atom and JSON Feed embed the token's feed URL; RSS bodies are shared by
+    # every token with the same scope
+    feed_ref = f"token={token}|" if fmt != "rss" else ""
     etag = _etag(
-        f"cat={category or '*'}|feed={feed_id or '*'}|limit={lim}",
+        f"{feed_ref}cat={category or '*'}|feed={feed_id or '*'}|limit={lim}"
+        f"|before={before or ''}|since={since or ''}|q={query or ''}|full={int(full)}|format={fmt}",
         agg.get("max_run_id"),
         max_pub,
         int(agg.get("total_items") or 0),
         agg.get("max_hash"),
     )
     last_mod = _http_last_modified(max_pub)
+    coding = negotiate(request.headers.get("accept-encoding"))
 
-    if request.headers.get("if-none-match") == etag:
-        return Response(status_code=304)
+    headers = {
+        "ETag": _variant_etag(etag, coding),
+        "Last-Modified": last_mod,
+        "Cache-Control": "public, max-age=60",
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
     if request.headers.get("if-modified-since") == last_mod:
-        return Response(status_code=304)
-
-    items = rss_select_items(category, feed_id, lim)
-
-    fg = FeedGenerator()
-    fg.title(_feed_title(APP_TITLE, category, feed_id))
-    fg.link(href=APP_LINK, rel="alternate")
-    fg.description("Merged items from FEED_DATA")
-    if max_pub:
-        fg.lastBuildDate(max_pub)
-
-    for r in items:
-        fe = fg.add_entry()
-        fe.title(r.get("title") or r.get("link") or "(untitled)")
-        link = r.get("link") or ""
-        if link:
-            fe.link(href=link, rel="alternate")
-        fe.guid(r.get("sha1_hash") or link, permalink=False)
-        pubdt = _to_utc(r.get("published_dt"))
-        if pubdt:
-            fe.pubDate(pubdt)
-        summary = r.get("summary") or ""
-        if summary:
-            fe.description(summary)
-        cat = r.get("category") or ""
-        if cat:
-            fe.category(term=cat)
-
-    rss_key_touch(token)
-
-    return Response(
-        content=fg.rss_str(pretty=True),
-        media_type="application/rss+xml; charset=utf-8",
-        headers={
-            "ETag": etag,
-            "Last-Modified": last_mod,
-            "Cache-Control": "public, max-age=60",
-        },
+        return Response(status_code=304, headers=headers)
+
+    token_cache.touch(token)
+    if coding != IDENTITY:
+        headers["Content-Encoding"] = coding
+
+    cached = render_cache.get(_variant_etag(etag, coding))
+    if cached is None and coding != IDENTITY:
+        # Rendered before under another coding: encode once and keep the variant
+        identity = render_cache.get(etag)
+        if identity is not None:
+            body = await run_in_threadpool(compress, identity.body, coding)
+            cached = CachedFeed(body=body, headers=identity.headers, scope=identity.scope)
+            render_cache.put(_variant_etag(etag, coding), cached)
+    if cached is not None:
+        return Response(
+            content=cached.body,
+            media_type=MEDIA_TYPES[fmt],
+            headers={**headers, "X-Cache": "HIT", **cached.headers},
+            status_code=200,
+        )
+
+    if since_key:
+        items = await rss_select_items_since_async(category, feed_id, lim, since_key, query, full)
+        items.sort(key=lambda r: (r["published_dt"], r["id"]), reverse=True)
+    else:
+        items = await rss_select_items_async(category, feed_id, lim, before_key, query, full)
+    cursor_headers = _cursor_headers(items, lim, since, since_key)
+    chunks = _render_chunks(fmt, _feed_url(token, fmt), category, feed_id, query, max_pub, items, full)
+
+    # Serialized incrementally in the threadpool; the full body is cached at the end
+    return StreamingResponse(
+        _stream_into_cache(etag, (category, feed_id), coding, chunks, cursor_headers),
+        media_type=MEDIA_TYPES[fmt],
+        headers={**headers, "X-Cache": "MISS", **cursor_headers},
         status_code=200,
     )
+
+
+# --- push: Server-Sent Events ---
+
+
+def _sse_event(cursor: str, items: List[Dict[str, Any]], full: bool = False) -> bytes:
+    variant = _fragment_variant(full)
+    return b"".join(
+        [
+            f'event: items\nid: {cursor}\ndata: {{"cursor": {json.dumps(cursor)}, "items": ['.encode("utf-8"),
+            b", ".join(item_fragment("json", r, fragment_cache, variant) for r in items),
+            b"]}\n\n",
+        ]
+    )
+
+
+async def _sse_stream(
+    token: str, category: Optional[str], feed_id: Optional[str], query: Optional[str], lim: int,
+    since_key: Tuple[int, int], full: bool = False,
+) -> AsyncIterator[bytes]:
+    queue = run_broker.subscribe()
+    try:
+        yield f"retry: {int(SSE_PING_SECONDS * 1000)}\n\n".encode("utf-8")
+        while True:
+            try:
+                notice = await asyncio.wait_for(queue.get(), timeout=SSE_PING_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if not notice.affects(category, feed_id):
+                continue
+            if not await token_cache.get(token):
+                return
+            # Drain everything newer than the client's cursor, oldest first
+            while True:
+                items = await rss_select_items_since_async(category, feed_id, lim, since_key, query, full)
+                if not items:
+                    break
+                newest = items[-1]
+                since_key = (newest["run_id"], newest["id"])
+                yield _sse_event(_encode_since_cursor(*since_key), items, full)
+                if len(items) < lim:
+                    break
+    finally:
+        run_broker.unsubscribe(queue)
+
+
+@app.get("/rss/{token}/events")
+async def rss_events(
+    token: str,
+    request: Request,
+    since: Optional[str] = None,
+    limit: Optional[int] = None,
+    q: Optional[str] = None,
+):
+    """
+    Server-Sent Events stream of new items for the token's scope.
+
+    Each worker run that touches the scope produces `items` events (JSON Feed
+    items, in the order they were stored) whose id is an X-Since-Cursor, so
+    reconnecting with Last-Event-ID resumes without gaps. Items updated by a
+    later run are sent again. Without a cursor the stream starts after the
+    last item stored now. `q` filters as on /rss/{token}.
+    """
+    row = await token_cache.get(token)
+    if not row:
+        raise HTTPException(status_code=403, detail="Invalid token")
+    category = row.get("category")
+    feed_id = row.get("feed_id")
+    lim = min(max(1, limit or row.get("limit_default", 100)), MAX_LIMIT)
+    query = _search_query(q, row)
+
+    cursor = request.headers.get("last-event-id") or since
+    if cursor:
+        since_key = _decode_since_cursor(cursor)
+    else:
+        since_key = await rss_latest_cursor_async(category, feed_id)
+    token_cache.touch(token)
+
+    return StreamingResponse(
+        _sse_stream(token, category, feed_id, query, lim, since_key, bool(row.get("full_content"))),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --- metrics ---
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "rss_http_request_duration_seconds",
+    "Time until response headers, by route and status",
+    ["route", "status"],
+)
+
+
+def _cache_samples() -> Iterator[Sample]:
+    caches = (("render", render_cache), ("fragment", fragment_cache), ("head", head_cache), ("token", token_cache))
+    for name, cache in caches:
+        yield "rss_cache_requests_total", {"cache": name, "result": "hit"}, cache.hits
+        yield "rss_cache_requests_total", {"cache": name, "result": "miss"}, cache.misses
+
+
+def _render_cache_samples() -> Iterator[Sample]:
+    stats = render_cache.stats()
+    yield "rss_render_cache_bytes", {}, stats["bytes"]
+
+
+def _fragment_cache_samples() -> Iterator[Sample]:
+    yield "rss_fragment_cache_bytes", {}, fragment_cache.stats()["bytes"]
+
+
+REGISTRY.collect("rss_cache_requests_total", "counter", "In-process cache lookups", _cache_samples)
+REGISTRY.collect("rss_render_cache_bytes", "gauge", "Bytes held by the render cache", _render_cache_samples)
+REGISTRY.collect("rss_fragment_cache_bytes", "gauge", "Bytes held by the item fragment cache", _fragment_cache_samples)
+
+@app.middleware("http")
+async def _observe_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    REQUEST_LATENCY.observe(
+        time.perf_counter() - started,
+        route=getattr(route, "path", "unmatched"),
+        status=str(response.status_code),
+    )
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus text exposition of this API process's metrics. Worker metrics
+    are served by each scheduler process (SCHED_METRICS_PORT).
+    """
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,258 @@
+# feedserver.py
+import json
+import time
+import random
+import hashlib
+import threading
+import multiprocessing
+import urllib.request
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class FeedConfig:
+    """
+    Shape of the synthetic feed population; every knob is deterministic given seed.
+    """
+
+    feeds: int = 100
+    entries: int = 30  # items per document
+    summary_bytes: int = 400  # approximate size of each item's description
+    atom_share: float = 0.25  # fraction of feeds served as Atom instead of RSS
+    churn: float = 0.1  # chance a feed gains new items in a given round
+    new_per_churn: int = 2  # items added when a feed churns
+    conditional_share: float = 0.5  # fraction of feeds with ETag/Last-Modified and 304s
+    volatile_build: bool = True  # stamp lastBuildDate/updated with the request time
+    latency_ms: float = 50.0
+    jitter_ms: float = 20.0
+    hosts: int = 8  # spread feeds over 127.0.0.1..127.0.0.N (per-host fetch caps)
+    seed: int = 1
+
+
+def _roll(cfg: FeedConfig, *key) -> float:
+    digest = hashlib.blake2b(repr((cfg.seed,) + key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64
+
+
+def generation(cfg: FeedConfig, feed: int, round_no: int) -> int:
+    """
+    How many times feed has churned by round round_no (round 0 is the cold start).
+    """
+    return sum(1 for r in range(1, round_no + 1) if _roll(cfg, "churn", feed, r) < cfg.churn)
+
+
+def is_atom(cfg: FeedConfig, feed: int) -> bool:
+    return _roll(cfg, "atom", feed) < cfg.atom_share
+
+
+def is_conditional(cfg: FeedConfig, feed: int) -> bool:
+    return _roll(cfg, "cond", feed) < cfg.conditional_share
+
+
+# --- documents ---
+
+
+def _summary(cfg: FeedConfig, feed: int, item: int) -> str:
+    words = f"feed {feed} item {item} lorem ipsum dolor sit amet consectetur adipiscing "
+    text = (words * (cfg.summary_bytes // len(words) + 1))[: cfg.summary_bytes]
+    return f"<p>{text}</p>"
+
+
+def _items(cfg: FeedConfig, feed: int, gen: int) -> List[Tuple[int, datetime]]:
+    newest = cfg.entries + gen * cfg.new_per_churn
+    out = []
+    for k in range(newest - 1, newest - 1 - cfg.entries, -1):
+        out.append((k, EPOCH + timedelta(hours=k, minutes=feed % 60)))
+    return out
+
+
+@lru_cache(maxsize=4096)
+def render(cfg: FeedConfig, feed: int, gen: int) -> Tuple[str, str, str]:
+    """
+    (head, tail, content type) of a document; the build stamp goes between.
+    """
+    items = _items(cfg, feed, gen)
+    link = f"https://feed{feed}.bench.invalid/"
+    if is_atom(cfg, feed):
+        parts = []
+        for k, dt in items:
+            parts.append(
+                "<entry>"
+                f"<id>urn:bench:{feed}:{k}</id>"
+                f"<title>Feed {feed} entry {k}</title>"
+                f'<link href="{link}posts/{k}"/>'
+                f"<published>{dt.isoformat()}</published>"
+                f"<updated>{dt.isoformat()}</updated>"
+                f'<summary type="html">{escape(_summary(cfg, feed, k))}</summary>'
+                "</entry>"
+            )
+        head = (
+            "<?xml version='1.0' encoding='UTF-8'?>"
+            '<feed xmlns="http://www.w3.org/2005/Atom">'
+            f"<id>{link}</id><title>Bench feed {feed}</title>"
+            f'<link href="{link}"/><updated>'
+        )
+        return head, "</updated>" + "".join(parts) + "</feed>", "application/atom+xml"
+
+    parts = []
+    for k, dt in items:
+        parts.append(
+            "<item>"
+            f"<title>Feed {feed} item {k}</title>"
+            f"<link>{link}posts/{k}</link>"
+            f'<guid isPermaLink="false">bench-{feed}-{k}</guid>'
+            f"<pubDate>{format_datetime(dt, usegmt=True)}</pubDate>"
+            f"<description>{escape(_summary(cfg, feed, k))}</description>"
+            "</item>"
+        )
+    head = (
+        "<?xml version='1.0' encoding='UTF-8'?><rss version='2.0'><channel>"
+        f"<title>Bench feed {feed}</title><link>{link}</link>"
+        "<description>synthetic</description><lastBuildDate>"
+    )
+    return head, "</lastBuildDate>" + "".join(parts) + "</channel></rss>", "application/rss+xml"
+
+
+def _build_stamp(cfg: FeedConfig, feed: int, gen: int) -> datetime:
+    if cfg.volatile_build:
+        return datetime.now(timezone.utc).replace(microsecond=0)
+    return EPOCH + timedelta(days=gen, minutes=feed % 60)
+
+
+# --- HTTP ---
+
+
+class _State:
+    def __init__(self, cfg: FeedConfig):
+        self.cfg = cfg
+        self.round_no = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.lock = threading.Lock()
+
+
+def _handler(state: _State):
+    cfg = state.cfg
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes = b"", headers: Optional[dict] = None):
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/_round":
+                with state.lock:
+                    state.round_no = int(parse_qs(url.query)["n"][0])
+                    state.requests = state.not_modified = 0
+                return self._send(204)
+            if url.path == "/_stats":
+                with state.lock:
+                    body = f'{{"requests": {state.requests}, "not_modified": {state.not_modified}}}'
+                return self._send(200, body.encode(), {"Content-Type": "application/json"})
+
+            try:
+                feed = int(url.path.rsplit("/", 1)[-1].split(".")[0])
+            except ValueError:
+                return self._send(404)
+            delay = cfg.latency_ms + random.uniform(-cfg.jitter_ms, cfg.jitter_ms)
+            time.sleep(max(0.0, delay) / 1000)
+
+            gen = generation(cfg, feed, state.round_no)
+            with state.lock:
+                state.requests += 1
+            headers = {}
+            if is_conditional(cfg, feed):
+                etag = f'"{feed}-{gen}"'
+                modified = format_datetime(EPOCH + timedelta(days=gen), usegmt=True)
+                headers.update({"ETag": etag, "Last-Modified": modified})
+                if self.headers.get("If-None-Match") == etag:
+                    with state.lock:
+                        state.not_modified += 1
+                    return self._send(304, headers=headers)
+
+            head, tail, ctype = render(cfg, feed, gen)
+            atom = ctype == "application/atom+xml"
+            stamp = _build_stamp(cfg, feed, gen)
+            stamp_s = stamp.isoformat() if atom else format_datetime(stamp, usegmt=True)
+            headers["Content-Type"] = f"{ctype}; charset=utf-8"
+            self._send(200, (head + stamp_s + tail).encode("utf-8"), headers)
+
+    return Handler
+
+
+def _serve(cfg: FeedConfig, ready) -> None:
+    state = _State(cfg)
+    handler = _handler(state)
+    ports = []
+    for h in range(cfg.hosts):
+        srv = ThreadingHTTPServer((f"127.0.0.{h + 1}", 0), handler)
+        srv.daemon_threads = True
+        ports.append(srv.server_address[1])
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+    ready.send(ports)
+    threading.Event().wait()
+
+
+class FeedServer:
+    """
+    Synthetic feeds served from a separate process, so serving them doesn't
+    compete with the ingest under test for the GIL.
+    """
+
+    def __init__(self, cfg: FeedConfig):
+        self.cfg = cfg
+        self._proc: Optional[multiprocessing.Process] = None
+        self._ports: List[int] = []
+
+    def start(self) -> "FeedServer":
+        ctx = multiprocessing.get_context("spawn")
+        parent, child = ctx.Pipe()
+        self._proc = ctx.Process(target=_serve, args=(self.cfg, child), daemon=True)
+        self._proc.start()
+        self._ports = parent.recv()
+        return self
+
+    def stop(self) -> None:
+        if self._proc is not None:
+            self._proc.terminate()
+            self._proc.join()
+            self._proc = None
+
+    def url(self, feed: int) -> str:
+        h = feed % self.cfg.hosts
+        ext = "atom" if is_atom(self.cfg, feed) else "xml"
+        return f"http://127.0.0.{h + 1}:{self._ports[h]}/feeds/{feed}.{ext}"
+
+    def _control(self, path: str) -> bytes:
+        with urllib.request.urlopen(f"http://127.0.0.1:{self._ports[0]}{path}") as resp:
+            return resp.read()
+
+    def set_round(self, round_no: int) -> None:
+        # every host shares one process-wide state, so one call covers them all
+        self._control(f"/_round?n={round_no}")
+
+    def stats(self) -> dict:
+        return json.loads(self._control("/_stats"))
+
+    def config(self) -> dict:
+        return asdict(self.cfg)
@@ -0,0 +1,178 @@
+# ingest.py
+"""
+End-to-end ingest benchmark against synthetic feeds and a local Postgres.
+
+    uv run python -m bench.ingest --feeds 500 --rounds 4 --out bench.json
+
+Registers bench-* feeds pointing at a local feed server, runs ingest() once
+per round (round 0 is the cold start, later rounds apply churn) and prints a
+JSON report. Bench feeds and their items are removed before and after unless
+--keep is given. Use a scratch database: runs are recorded as usual.
+"""
+import os
+import io
+import sys
+import json
+import argparse
+import platform
+import statistics
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+
+from bench.feedserver import FeedConfig, FeedServer
+
+BENCH_PREFIX = "bench-"
+BENCH_CATEGORY = "bench"
+
+
+def _args(argv: List[str]) -> argparse.Namespace:
+    d = FeedConfig()
+    p = argparse.ArgumentParser(prog="bench.ingest", description=__doc__.split("\n\n")[0])
+    p.add_argument("--feeds", type=int, default=d.feeds)
+    p.add_argument("--entries", type=int, default=d.entries, help="items per document")
+    p.add_argument("--summary-bytes", type=int, default=d.summary_bytes)
+    p.add_argument("--atom-share", type=float, default=d.atom_share)
+    p.add_argument("--churn", type=float, default=d.churn, help="chance a feed changes per round")
+    p.add_argument("--new-per-churn", type=int, default=d.new_per_churn)
+    p.add_argument("--conditional-share", type=float, default=d.conditional_share,
+                   help="fraction of feeds answering If-None-Match with 304")
+    p.add_argument("--stable-build", action="store_true",
+                   help="keep lastBuildDate/updated fixed between changes")
+    p.add_argument("--latency-ms", type=float, default=d.latency_ms)
+    p.add_argument("--jitter-ms", type=float, default=d.jitter_ms)
+    p.add_argument("--hosts", type=int, default=d.hosts)
+    p.add_argument("--seed", type=int, default=d.seed)
+    p.add_argument("--rounds", type=int, default=3)
+    p.add_argument("--out", help="also write the JSON report to this file")
+    p.add_argument("--keep", action="store_true", help="leave bench feeds and items in the DB")
+    p.add_argument("--verbose", action="store_true", help="show ingest's per-feed output")
+    return p.parse_args(argv)
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+def _stage(values: List[float]) -> Dict[str, float]:
+    return {
+        "sum_s": round(sum(values), 4),
+        "p50_ms": round(_pct(values, 50) * 1000, 2),
+        "p95_ms": round(_pct(values, 95) * 1000, 2),
+        "max_ms": round(max(values, default=0.0) * 1000, 2),
+    }
+
+
+def _round(round_no: int, wall: float, outcomes, db_before, db_after, server: Dict[str, int]) -> Dict[str, Any]:
+    stats = [s for _, s in outcomes]
+    by_outcome: Dict[str, int] = {}
+    for s in stats:
+        by_outcome[s.outcome or "failed"] = by_outcome.get(s.outcome or "failed", 0) + 1
+    seen = sum(s.entries_seen for s in stats)
+    return {
+        "round": round_no,
+        "wall_s": round(wall, 4),
+        "feeds": len(stats),
+        "feeds_per_s": round(len(stats) / wall, 2) if wall else 0.0,
+        "entries_seen": seen,
+        "entries_changed": sum(s.entries_changed for s in stats),
+        "entries_per_s": round(seen / wall, 2) if wall else 0.0,
+        "bytes": sum(s.bytes for s in stats),
+        "outcomes": by_outcome,
+        "errors": sum(1 for s in stats if s.error),
+        "db": {
+            "round_trips": db_after.statements - db_before.statements,
+            "seconds": round(db_after.seconds - db_before.seconds, 4),
+        },
+        "stages": {
+            "fetch": _stage([s.fetch_seconds for s in stats]),
+            "parse": _stage([s.parse_seconds for s in stats if s.parse_seconds]),
+            "db_write": _stage([s.db_seconds for s in stats if s.db_seconds]),
+        },
+        "server": server,
+    }
+
+
+def main(argv: List[str]) -> Dict[str, Any]:
+    load_dotenv()
+    a = _args(argv)
+    cfg = FeedConfig(
+        feeds=a.feeds, entries=a.entries, summary_bytes=a.summary_bytes,
+        atom_share=a.atom_share, churn=a.churn, new_per_churn=a.new_per_churn,
+        conditional_share=a.conditional_share, volatile_build=not a.stable_build,
+        latency_ms=a.latency_ms, jitter_ms=a.jitter_ms, hosts=a.hosts, seed=a.seed,
+    )
+
+    # imported here so FETCH_* / PARSE_WORKERS overrides in the environment apply
+    from main import ingest
+    from src.modules import fetcher, parser
+    from src.modules.pgdao import (
+        db_stats,
+        execute_sql_file,
+        feed_register_upsert,
+        feeds_get_by_ids,
+        scope_head_refresh,
+    )
+
+    def cleanup(ids: List[str]) -> None:
+        execute_sql_file("queries/feeds_delete.sql", (ids, ids, ids, ids, ids))
+        scope_head_refresh()
+
+    server = FeedServer(cfg).start()
+    ids = [f"{BENCH_PREFIX}{i:05d}" for i in range(cfg.feeds)]
+    rounds: List[Dict[str, Any]] = []
+    try:
+        cleanup(ids)
+        for i, fid in enumerate(ids):
+            feed_register_upsert(feed_id=fid, feed_url=server.url(i), category=BENCH_CATEGORY)
+        print(f"🧪 {cfg.feeds} bench feeds registered; {a.rounds} round(s)", file=sys.stderr)
+
+        for r in range(a.rounds):
+            server.set_round(r)
+            rows = feeds_get_by_ids(ids)
+            before = db_stats()
+            started = time.perf_counter()
+            if a.verbose:
+                outcomes = ingest(rows)
+            else:
+                with redirect_stdout(io.StringIO()):
+                    outcomes = ingest(rows)
+            wall = time.perf_counter() - started
+            rounds.append(_round(r, wall, outcomes, before, db_stats(), server.stats()))
+            print(
+                f"⏱️ round {r}: {wall:.2f}s  {rounds[-1]['feeds_per_s']} feeds/s  "
+                f"{rounds[-1]['entries_per_s']} entries/s  {rounds[-1]['db']['round_trips']} DB round trips",
+                file=sys.stderr,
+            )
+    finally:
+        if not a.keep:
+            cleanup(ids)
+        server.stop()
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": server.config(),
+        "env": {
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "parse_workers": parser.PARSE_WORKERS,
+            "fetch_concurrency": fetcher.FETCH_CONCURRENCY,
+            "fetch_per_host": fetcher.FETCH_PER_HOST,
+        },
+        "rounds": rounds,
+    }
+    if a.out:
+        with open(a.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    print(json.dumps(main(sys.argv[1:]), indent=2))
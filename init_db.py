@@ -1,30 +1,87 @@
 # init.py
 import csv
+import sys
 import base64
+import hashlib
 import secrets
+import argparse
+from typing import Any, Dict, List
 from dotenv import load_dotenv
-from src.modules.pgdao import apply_schema, execute_sql_file, feed_register_upsert
+from src.modules.canonical import canonical_url
+from src.modules.pgdao import (
+    apply_schema,
+    execute_sql_file,
+    feed_data_content_key_missing,
+    feed_data_content_key_set,
+    feed_register_sync,
+    rss_keys_count,
+    scope_head_refresh,
+)
 
 FEEDS_CSV_PATH = "src/config/feeds.csv"
+CONTENT_KEY_BATCH = 5000
 
 
-def _init_feeds():
-    with open(FEEDS_CSV_PATH, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        count = 0
-        for row in reader:
-            feed_register_upsert(
-                feed_id=row.get("feed_id", "").strip(),
-                feed_url=row.get("feed_url", "").strip(),
-                category=row.get("category", "").strip(),
-                enabled=(row.get("enabled", "true").strip().lower() == "true"),
-                etag=None,
-                last_modified=None,
-                last_seen_published_dt=None,
-                last_run_id=None,
-            )
-            count += 1
-    print(f"📡 Loaded {count} feeds into feed_register.")
+def _read_feeds(path: str) -> List[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        feeds = []
+        for row in csv.DictReader(f):
+            feed_id = (row.get("feed_id") or "").strip()
+            if not feed_id:
+                continue
+            feeds.append({
+                "feed_id": feed_id,
+                "feed_url": (row.get("feed_url") or "").strip(),
+                "category": (row.get("category") or "").strip(),
+                "enabled": (row.get("enabled") or "true").strip().lower() == "true",
+            })
+    return feeds
+
+
+def _sync_feeds():
+    """
+    Bring feed_register in line with feeds.csv. Unchanged feeds keep their
+    conditional-GET state and schedule, so a deploy doesn't refetch everything.
+    """
+    feeds = _read_feeds(FEEDS_CSV_PATH)
+    if not feeds:
+        # an empty/missing list would disable every feed; treat it as a mistake
+        print(f"⚠️ {FEEDS_CSV_PATH} lists no feeds; feed_register left as is.")
+        return
+    diff = feed_register_sync(feeds)
+    if diff["added"] or diff["changed"] or diff["disabled"]:
+        scope_head_refresh()
+    print(
+        f"📡 feeds.csv synced | {diff['listed']} listed  ➕ {diff['added']} added  "
+        f"✏️ {diff['changed']} changed  ⏸️ {diff['disabled']} disabled"
+    )
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _backfill_content_keys():
+    """
+    Fill content_key (hash of the canonical link) for items stored before it
+    existed; new items get it at ingest. sha1_hash is reset to the hash of the
+    published link on the way, for rows that were keyed by the canonical link.
+    Done here rather than in schema/050: canonical_url is Python and Postgres
+    has no built-in sha1.
+    """
+    done, after = 0, 0
+    while True:
+        rows = feed_data_content_key_missing(after, CONTENT_KEY_BATCH)
+        if not rows:
+            break
+        for r in rows:
+            r["sha1_hash"] = _sha1(r["link"])
+            r["content_key"] = _sha1(canonical_url(r["link"]))
+        feed_data_content_key_set(rows)
+        done += len(rows)
+        after = rows[-1]["id"]
+    if done:
+        print(f"🔑 Content keys filled for {done} item(s).")
 
 
 def _token(nbytes: int = 24) -> str:
@@ -33,21 +90,23 @@ def _token(nbytes: int = 24) -> str:
 
 
 def _init_tokens():
-    # Apply the rss_keys schema (in case apply_schema doesn't include it yet)
-    execute_sql_file("schema/020_create_table_rss_keys.sql")
+    # Only on first init; existing tokens are never replaced
+    if rss_keys_count() > 0:
+        print("🔐 Tokens already exist; none created.")
+        return
 
     # Admin token: global scope, higher limit
     admin_tok = _token()
     execute_sql_file(
         "queries/rss_key_insert.sql",
-        (admin_tok, "admin", None, None, 500, True, True),
+        (admin_tok, "admin", None, None, 500, None, True, True),
     )
 
     # Regular token: global scope, default limit
     regular_tok = _token()
     execute_sql_file(
         "queries/rss_key_insert.sql",
-        (regular_tok, "user", None, None, 100, True, False),
+        (regular_tok, "user", None, None, 100, None, True, False),
     )
 
     print("🔐 Tokens created:")
@@ -55,16 +114,25 @@ def _init_tokens():
     print(f"• User:     {regular_tok}")
 
 
-def main():
+def main(argv: List[str]):
+    p = argparse.ArgumentParser(prog="init_db.py", description="Migrate the schema and sync feeds.csv.")
+    p.add_argument(
+        "--reset", action="store_true",
+        help="drop all feed tables (items, runs, poll state) first; rss_keys are kept",
+    )
+    args = p.parse_args(argv)
+
     load_dotenv()
-    execute_sql_file("schema/000_drop_tables.sql")
-    apply_schema()
-    # Ensure rss_keys exists (kept explicit so we don't touch your existing apply_schema)
-    execute_sql_file("schema/020_create_table_rss_keys.sql")
-    _init_feeds()
+    if args.reset:
+        execute_sql_file("schema/000_drop_tables.sql")
+        print("🧨 Feed tables dropped.")
+    applied = apply_schema()
+    print(f"🧱 Schema: {len(applied)} migration(s) applied" + (f" ({', '.join(applied)})" if applied else ""))
+    _backfill_content_keys()
+    _sync_feeds()
     _init_tokens()
-    print("✅ Schema applied, feeds initialized, and tokens generated.")
+    print("✅ Schema up to date, feeds synced.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(sys.argv[1:])
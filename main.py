@@ -1,60 +1,32 @@
 # main.py
+import sys
 import time
-import hashlib
+import argparse
 from datetime import datetime, timezone
-from typing import List, Iterable, Optional
+from typing import Any, Callable, Dict, List, Iterable, Iterator, Optional, Tuple
 
-import feedparser
-
-from src.modules.feeds import FeedDef, RssEntry
+from src.modules.archive import ArchivedFetch, ArchiveReader, ArchiveWriter, fetch_archive
+from src.modules.feeds import FeedDef, FeedRunStats, RssEntry
+from src.modules.fetcher import FetchResult, fetch_feeds
+from src.modules.parser import parse_feeds
+from src.modules.retention import cutoff_for
 from src.modules.pgdao import (
     runs_start,
     runs_finish,
+    runs_notify,
     feeds_get_enabled,
+    feeds_get_by_ids,
     feed_register_update_state,
-    feed_data_upsert,
-    feed_data_count_by_run,
+    feed_data_upsert_batch,
     feed_data_all_by_run,
+    feed_run_metrics_insert_batch,
+    feed_head_refresh,
+    scope_head_refresh,
 )
 
 
 # ---------- tiny helpers ----------
 
-def _to_dt_from_struct(t) -> Optional[datetime]:
-    if isinstance(t, time.struct_time):
-        return datetime.fromtimestamp(time.mktime(t), tz=timezone.utc)
-    return None
-
-
-def _to_published_dt(t) -> datetime:
-    dt = _to_dt_from_struct(t)
-    return dt if dt is not None else datetime.now(timezone.utc)
-
-
-def _sha1(text: str) -> str:
-    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
-
-
-def _to_rss_entries(entries: Iterable[object]) -> List[RssEntry]:
-    out: List[RssEntry] = []
-    for e in entries:
-        ts = getattr(e, "published_parsed", None) or getattr(e, "updated_parsed", None)
-        has_real = isinstance(ts, time.struct_time)
-        link = getattr(e, "link", "") or ""
-        out.append(
-            RssEntry(
-                sha1_hash=_sha1(link),
-                title=getattr(e, "title", ""),
-                link=link,
-                uid=getattr(e, "id", "") or getattr(e, "guid", "") or "",
-                published=_to_published_dt(ts),
-                summary=getattr(e, "summary", ""),
-                has_real_published=has_real,
-            )
-        )
-    return out
-
-
 def _dict_to_feeddef(row) -> FeedDef:
     return FeedDef(
         feed_id=row["feed_id"],
@@ -64,12 +36,15 @@ def _dict_to_feeddef(row) -> FeedDef:
         etag=row.get("etag"),
         last_modified=row.get("last_modified"),
         last_seen_published_dt=row.get("last_seen_published_dt"),
+        body_hash=row.get("body_hash"),
     )
 
 
-def _status_str(http_status: Optional[int]) -> str:
+def _status_str(http_status: Optional[int | str]) -> str:
     if http_status == 304:
         return "🔄 304 Not Modified"
+    if http_status == "same-body":
+        return "🔄 body unchanged"
     if http_status == 307:
         return "➡️ 307 Redirect"
     if http_status is None:
@@ -81,7 +56,7 @@ def _status_str(http_status: Optional[int]) -> str:
     return f"⛔ {http_status}"
 
 
-def _print_feed_status(feed: FeedDef, http_status: Optional[int], new_count: int):
+def _print_feed_status(feed: FeedDef, http_status: Optional[int | str], new_count: int):
     print(f"📰 {feed}  |  {_status_str(http_status)}  |  🆕 {new_count} new this run")
 
 
@@ -93,6 +68,7 @@ def _update_feed_register_if_changed(
     new_waterline: Optional[datetime],
     new_xml_dt: Optional[datetime],
     new_last_run_id: Optional[int],
+    new_body_hash: Optional[str],
     prev_xml_dt: Optional[datetime],
     prev_last_run_id: Optional[int],
 ):
@@ -102,6 +78,7 @@ def _update_feed_register_if_changed(
     waterline = new_waterline if new_waterline is not None else feed.last_seen_published_dt
     xml_dt = new_xml_dt if new_xml_dt is not None else prev_xml_dt
     last_run_id = new_last_run_id if new_last_run_id is not None else prev_last_run_id
+    body_hash = new_body_hash if new_body_hash is not None else feed.body_hash
 
     changed = (
         etag != feed.etag
@@ -109,6 +86,7 @@ def _update_feed_register_if_changed(
         or waterline != feed.last_seen_published_dt
         or xml_dt != prev_xml_dt
         or last_run_id != prev_last_run_id
+        or body_hash != feed.body_hash
     )
     if changed:
         feed_register_update_state(
@@ -118,14 +96,30 @@ def _update_feed_register_if_changed(
             last_seen_published_dt=waterline,
             feed_xml_updated_dt=xml_dt,
             last_run_id=last_run_id,
+            body_hash=body_hash,
         )
 
 
 # ---------- main orchestration ----------
 
-def main():
+def ingest(
+    feed_rows: Iterable[Dict[str, Any]],
+    worker: Optional[str] = None,
+    *,
+    fetch: Callable[[Iterable[FeedDef]], Iterable[FetchResult]] = fetch_feeds,
+    archive: Optional[ArchiveWriter] = None,
+) -> List[Tuple[FetchResult, FeedRunStats]]:
+    """
+    One recorded run over the given feed_register rows: fetch, parse, upsert,
+    refresh head summaries and notify. Returns the fetch result and per-stage
+    stats of every feed, so callers (scheduler.py, bench/) can plan the next
+    poll or report timings. worker is recorded on the run.
+
+    fetch supplies the responses (replay() feeds archived ones); with archive
+    set, every response is also appended to it.
+    """
     started = datetime.now(timezone.utc)
-    run_id = runs_start()
+    run_id = runs_start(worker)
 
     feeds_attempted = 0
     feeds_ok = 0
@@ -133,23 +127,62 @@ def main():
     feeds_failed = 0
     entries_seen = 0
     entries_processed = 0  # inserted or updated
+    changed: Dict[str, str] = {}  # feed_id -> category, for the run NOTIFY
+
+    outcomes: List[Tuple[FetchResult, FeedRunStats]] = []
 
-    for row in feeds_get_enabled():
+    rows = {r["feed_id"]: r for r in feed_rows}
+
+    # 1) HTTP conditional GETs, concurrently; bodies are parsed in the process
+    #    pool as they arrive and come back here as each parse finishes
+    results = fetch(_dict_to_feeddef(r) for r in rows.values())
+    if archive is not None:
+        results = archive.recording(run_id, results)
+    for fetched, parsed in parse_feeds(results):
         feeds_attempted += 1
-        feed = _dict_to_feeddef(row)
+        feed = fetched.feed
+        row = rows[feed.feed_id]
         prev_xml_dt = row.get("feed_xml_updated_dt")
         prev_last_run_id = row.get("last_run_id")
-
-        # 1) HTTP conditional GET
-        parsed = feedparser.parse(feed.feed_url, etag=feed.etag, modified=feed.last_modified)
-        status = getattr(parsed, "status", None)
+        status = fetched.status
+        stats = FeedRunStats(
+            feed_id=feed.feed_id,
+            http_status=status,
+            bytes=len(fetched.body),
+            fetch_seconds=fetched.elapsed_seconds,
+            parse_seconds=parsed.parse_seconds if parsed is not None else 0.0,
+            error=fetched.error,
+        )
+        outcomes.append((fetched, stats))
 
         # Transport-layer no change
         if status == 304:
             feeds_not_modified += 1
+            stats.outcome = "not-modified"
             _print_feed_status(feed, status, 0)
             continue
 
+        db_started = time.perf_counter()
+
+        # Same bytes as last time (modulo build stamps): nothing to parse or upsert
+        if fetched.body_unchanged:
+            feeds_not_modified += 1
+            _update_feed_register_if_changed(
+                feed=feed,
+                new_etag=fetched.etag,
+                new_last_modified=fetched.modified,
+                new_waterline=None,
+                new_xml_dt=None,
+                new_last_run_id=None,
+                new_body_hash=None,
+                prev_xml_dt=prev_xml_dt,
+                prev_last_run_id=prev_last_run_id,
+            )
+            stats.outcome = "same-body"
+            stats.db_seconds = time.perf_counter() - db_started
+            _print_feed_status(feed, "same-body", 0)
+            continue
+
         # treat 200–299 + 307 as OK
         if status is not None and (200 <= int(status) < 300 or status == 307):
             feeds_ok += 1
@@ -157,63 +190,66 @@ def main():
             feeds_failed += 1
 
         # 2) XML-level timestamp (<updated> / <lastBuildDate>) check
-        xml_updated_struct = (
-            getattr(getattr(parsed, "feed", {}), "updated_parsed", None)
-            or getattr(getattr(parsed, "feed", {}), "published_parsed", None)
-        )
-        xml_updated_dt = _to_dt_from_struct(xml_updated_struct)
+        xml_updated_dt = parsed.xml_updated_dt
         if xml_updated_dt is not None and prev_xml_dt is not None and xml_updated_dt <= prev_xml_dt:
             _update_feed_register_if_changed(
                 feed=feed,
-                new_etag=parsed.get("etag"),
-                new_last_modified=parsed.get("modified"),
+                new_etag=fetched.etag,
+                new_last_modified=fetched.modified,
                 new_waterline=None,
                 new_xml_dt=prev_xml_dt,
                 new_last_run_id=None,
+                new_body_hash=fetched.fingerprint,
                 prev_xml_dt=prev_xml_dt,
                 prev_last_run_id=prev_last_run_id,
             )
+            stats.outcome = "xml-unchanged"
+            stats.db_seconds = time.perf_counter() - db_started
             _print_feed_status(feed, status, 0)
             continue
 
-        # 3) Parse entries (only when needed)
-        entries = _to_rss_entries(parsed.entries or [])
+        # 3) Entries (only when needed)
+        entries = parsed.rss_entries()
         entries_seen += len(entries)
+        stats.entries_seen = len(entries)
 
-        # 4) Upsert entries; compute safe waterline
+        # 4) Compute safe waterline; upsert the whole feed in one statement
         max_real_published = feed.last_seen_published_dt
         for e in entries:
             if e.has_real_published and (max_real_published is None or e.published > max_real_published):
                 max_real_published = e.published
 
-            feed_data_upsert(
-                feed_id=feed.feed_id,
-                run_id=run_id,
-                sha1_hash=e.sha1_hash,
-                uid=e.uid or None,
-                link=e.link,
-                title=e.title or None,
-                summary=e.summary or None,
-                published_dt=e.published,
-                has_real_published=bool(e.has_real_published),
-            )
-            entries_processed += 1
-
-        # 5) Count only new/updated entries for this feed
-        new_count = feed_data_count_by_run(feed.feed_id, run_id)
+        inserted, updated = feed_data_upsert_batch(
+            feed_id=feed.feed_id,
+            category=feed.category,
+            run_id=run_id,
+            entries=entries,
+            min_published_dt=cutoff_for(feed.category),
+        )
+        entries_processed += len(entries)
+
+        # 5) New/updated entries for this feed come straight back from the upsert
+        new_count = inserted + updated
+        if new_count > 0:
+            feed_head_refresh(feed.feed_id)
+            changed[feed.feed_id] = feed.category
+        stats.entries_changed = new_count
+        stats.outcome = "changed" if new_count > 0 else "unchanged"
         _print_feed_status(feed, status, new_count)
 
         # 6) Update feed_register if changed; bump last_run_id only when new_count > 0
         _update_feed_register_if_changed(
             feed=feed,
-            new_etag=parsed.get("etag"),
-            new_last_modified=parsed.get("modified"),
+            new_etag=fetched.etag,
+            new_last_modified=fetched.modified,
             new_waterline=max_real_published,
             new_xml_dt=xml_updated_dt,
             new_last_run_id=(run_id if new_count > 0 else None),
+            new_body_hash=fetched.fingerprint,
             prev_xml_dt=prev_xml_dt,
             prev_last_run_id=prev_last_run_id,
         )
+        stats.db_seconds = time.perf_counter() - db_started
 
     # 7) Print all new entries this run (ordered by feed_id)
     rows_all = feed_data_all_by_run(run_id)
@@ -233,6 +269,12 @@ def main():
     else:
         print("\n📥 New entries this run (all feeds): none ✨")
 
+    # Category/global head summaries read by the API's ETag lookup
+    scope_head_refresh()
+
+    # Per-feed outcome and stage timings (exported by the API's /metrics)
+    feed_run_metrics_insert_batch(run_id, [s for _, s in outcomes])
+
     # Finish run in DB
     runs_finish(
         run_id,
@@ -244,6 +286,8 @@ def main():
         entries_seen=entries_seen,
         entries_inserted=entries_processed,
     )
+    if changed:
+        runs_notify(run_id, changed)
 
     # One-line emoji summary
     elapsed = (datetime.now(timezone.utc) - started).total_seconds()
@@ -253,7 +297,71 @@ def main():
         f"⛔ failed: {feeds_failed}  👀 seen: {entries_seen}  ✍️ processed: {entries_processed}  "
         f"⏱️ {elapsed:.2f}s"
     )
+    return outcomes
+
+
+# ---------- replay ----------
+
+def _archived(
+    reader: ArchiveReader, records: List[ArchivedFetch]
+) -> Callable[[Iterable[FeedDef]], Iterator[FetchResult]]:
+    by_feed = {r.feed_id: r for r in records}
+
+    def fetch(feeds: Iterable[FeedDef]) -> Iterator[FetchResult]:
+        for feed in feeds:
+            record = by_feed[feed.feed_id]
+            yield record.to_result(feed, reader.body(record))
+
+    return fetch
+
+
+def replay(directory: str, reparse: bool = False) -> int:
+    """
+    Run the archived responses in directory (see archive.py) through parse ->
+    upsert -> feed_register, without the network: each recorded run becomes
+    one run here, in recording order. Feeds no longer enabled are skipped.
+
+    reparse drops each feed's change-detection state (body hash, XML stamp,
+    waterline) before its run, so bodies seen before are processed again,
+    e.g. after parser or dedup changes. Returns the number of runs replayed.
+    """
+    with ArchiveReader(directory) as reader:
+        runs = reader.runs()
+        print(f"⏪ replaying {len(runs)} recorded run(s) from {directory}")
+        for records in runs:
+            rows = feeds_get_by_ids([r.feed_id for r in records])
+            if not rows:
+                continue
+            if reparse:
+                for row in rows:
+                    row.update(body_hash=None, feed_xml_updated_dt=None, last_seen_published_dt=None)
+            ingest(rows, worker="replay", fetch=_archived(reader, records))
+    return len(runs)
+
+
+def main(argv: List[str]):
+    p = argparse.ArgumentParser(prog="main.py", description="Fetch all enabled feeds once.")
+    p.add_argument(
+        "--record", metavar="DIR",
+        help="append raw responses to this archive (default: FETCH_ARCHIVE_DIR, if set)",
+    )
+    p.add_argument("--replay", metavar="DIR", help="ingest an archive instead of fetching")
+    p.add_argument(
+        "--reparse", action="store_true",
+        help="with --replay: process every archived body, even ones seen before",
+    )
+    args = p.parse_args(argv)
+
+    if args.replay:
+        replay(args.replay, reparse=args.reparse)
+        return
+    archive = ArchiveWriter(args.record) if args.record else fetch_archive()
+    try:
+        ingest(feeds_get_enabled(), archive=archive)
+    finally:
+        if archive is not None:
+            archive.close()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(sys.argv[1:])
\ No newline at end of file
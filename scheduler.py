@@ -0,0 +1,168 @@
+# scheduler.py
+import os
+import signal
+import socket
+import threading
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+
+from main import ingest
+from src.modules.archive import fetch_archive
+from src.modules.feeds import FeedRunStats
+from src.modules.metrics import REGISTRY, STAGE_BUCKETS, serve
+from src.modules.pgdao import (
+    RETENTION_LOCK_KEY,
+    feed_register_claim,
+    feed_register_next_due,
+    feed_register_schedule_batch,
+    try_advisory_lock,
+)
+from src.modules.retention import prune
+from src.modules.schedule import PollState, initial_state, next_poll
+
+load_dotenv()
+
+# Name recorded on leases and runs; must differ between workers sharing a DB
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+# Feeds coming due within this window are fetched together as one run
+SCHED_BATCH_WINDOW_SECONDS = float(os.getenv("SCHED_BATCH_WINDOW_SECONDS", "30"))
+# Most feeds one worker claims per run
+SCHED_CLAIM_BATCH = int(os.getenv("SCHED_CLAIM_BATCH", "200"))
+# A claimed feed goes back to the pool if not rescheduled within this time
+# (worker crashed or hung); keep it well above the longest run
+SCHED_LEASE_SECONDS = float(os.getenv("SCHED_LEASE_SECONDS", "900"))
+# Longest idle sleep, so added / re-enabled feeds and lapsed leases are noticed
+SCHED_IDLE_SECONDS = float(os.getenv("SCHED_IDLE_SECONDS", "30"))
+# How often to apply feed_data retention (see retention.py)
+RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", "86400"))
+# Port for this worker's Prometheus /metrics; 0 turns it off
+SCHED_METRICS_PORT = int(os.getenv("SCHED_METRICS_PORT", "9101"))
+
+# Counted by the worker that did the work, so summing over workers is correct
+WORKER_STAGE = REGISTRY.histogram(
+    "rss_worker_stage_seconds", "Per-feed worker time by stage", ["stage"], STAGE_BUCKETS
+)
+WORKER_FEEDS = REGISTRY.counter(
+    "rss_worker_feeds_total", "Feeds processed by the worker, by outcome", ["outcome"]
+)
+WORKER_ERRORS = REGISTRY.counter(
+    "rss_worker_feed_errors_total", "Failed feed fetches, by error class", ["error_class"]
+)
+WORKER_BYTES = REGISTRY.counter("rss_worker_fetched_bytes_total", "Feed bytes downloaded by the worker")
+WORKER_ENTRIES = REGISTRY.counter("rss_worker_entries_changed_total", "Items inserted or updated by the worker")
+
+_stop = threading.Event()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _observe(stats: FeedRunStats) -> None:
+    WORKER_STAGE.observe(stats.fetch_seconds, stage="fetch")
+    if stats.parse_seconds:
+        WORKER_STAGE.observe(stats.parse_seconds, stage="parse")
+    if stats.db_seconds:
+        WORKER_STAGE.observe(stats.db_seconds, stage="db")
+    WORKER_FEEDS.inc(outcome=stats.outcome or "failed")
+    if stats.error_class:
+        WORKER_ERRORS.inc(error_class=stats.error_class)
+    WORKER_BYTES.inc(stats.bytes)
+    WORKER_ENTRIES.inc(stats.entries_changed)
+
+
+def _poll(rows: List[Dict[str, Any]]) -> Dict[str, PollState]:
+    states = {r["feed_id"]: initial_state(r, _now()) for r in rows}
+    try:
+        outcomes = ingest(rows, worker=WORKER_ID, archive=fetch_archive())
+    except Exception as exc:
+        # keep the process alive; retry these feeds after one batch window
+        print(f"⛔ run failed: {exc}")
+        retry = _now() + timedelta(seconds=SCHED_BATCH_WINDOW_SECONDS)
+        planned = {fid: replace(s, next_due_at=retry) for fid, s in states.items()}
+    else:
+        now = _now()
+        # feeds without an outcome keep their schedule but still hand back the lease
+        planned = dict(states)
+        for fetched, stats in outcomes:
+            _observe(stats)
+            fid = fetched.feed.feed_id
+            planned[fid] = next_poll(
+                states[fid],
+                status=fetched.status,
+                new_items=stats.entries_changed,
+                headers=fetched.headers,
+                now=now,
+            )
+    try:
+        feed_register_schedule_batch(planned, owner=WORKER_ID)
+    except Exception as exc:
+        # the leases run out, so these feeds become claimable again on their own
+        print(f"⛔ schedule update failed: {exc}")
+        _stop.wait(SCHED_IDLE_SECONDS)
+    return planned
+
+
+def _prune(now: datetime) -> None:
+    # never two workers at once; one that finds it running skips this round
+    with try_advisory_lock(RETENTION_LOCK_KEY) as locked:
+        if locked:
+            prune(now)
+        else:
+            print("🧹 retention running on another worker; skipped")
+
+
+def run() -> None:
+    prune_at = _now()
+    if SCHED_METRICS_PORT:
+        serve(REGISTRY, SCHED_METRICS_PORT)
+    print(f"⏱️ scheduler {WORKER_ID} started")
+
+    while not _stop.is_set():
+        now = _now()
+        if now >= prune_at:
+            try:
+                _prune(now)
+            except Exception as exc:
+                print(f"⛔ retention failed: {exc}")
+            prune_at = now + timedelta(seconds=RETENTION_INTERVAL_SECONDS)
+
+        horizon = now + timedelta(seconds=SCHED_BATCH_WINDOW_SECONDS)
+        try:
+            rows = feed_register_claim(WORKER_ID, horizon, SCHED_CLAIM_BATCH, SCHED_LEASE_SECONDS)
+        except Exception as exc:
+            print(f"⛔ claim failed: {exc}")
+            _stop.wait(SCHED_IDLE_SECONDS)
+            continue
+
+        if rows:
+            print(f"\n▶️  {WORKER_ID} polling {len(rows)} due feed(s) at {now:%F %T}Z")
+            _poll(rows)
+            continue
+
+        wake = min(prune_at, now + timedelta(seconds=SCHED_IDLE_SECONDS))
+        try:
+            next_due = feed_register_next_due()
+        except Exception as exc:
+            print(f"⛔ next-due lookup failed: {exc}")
+            next_due = None
+        if next_due is not None:
+            # wake when it enters the batch window
+            wake = min(wake, next_due - timedelta(seconds=SCHED_BATCH_WINDOW_SECONDS))
+            print(f"⏸️  next due at {next_due:%F %T}Z")
+        _stop.wait(max(0.0, (wake - _now()).total_seconds()))
+
+    print("👋 scheduler stopped")
+
+
+def _handle_signal(signum, _frame):
+    _stop.set()
+
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+    run()
@@ -0,0 +1,223 @@
+# archive.py
+import os
+import json
+import mmap
+import atexit
+import socket
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.modules.feeds import FeedDef
+from src.modules.fetcher import FetchResult
+
+load_dotenv()
+
+# Record every fetch response into this directory (off when empty); see main.py --replay
+FETCH_ARCHIVE_DIR = os.getenv("FETCH_ARCHIVE_DIR", "")
+# Start a new segment once the current one reaches this size
+FETCH_ARCHIVE_SEGMENT_BYTES = int(os.getenv("FETCH_ARCHIVE_SEGMENT_BYTES", str(256 * 1024 * 1024)))
+
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+
+
+@dataclass(slots=True)
+class ArchivedFetch:
+    """
+    Index record of one archived response; the body stays in its segment.
+    """
+
+    segment: str  # path of the .seg file
+    offset: int
+    length: int
+    writer: str  # segment name prefix shared by one writer's segments
+    run_id: int
+    feed_id: str
+    feed_url: str
+    fetched_at: str
+    status: Optional[int] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    href: str = ""
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
+
+    def to_result(self, feed: FeedDef, body: bytes) -> FetchResult:
+        return FetchResult(
+            feed=feed,
+            status=self.status,
+            body=body,
+            headers=dict(self.headers),
+            href=self.href,
+            error=self.error,
+            elapsed_seconds=self.elapsed_seconds,
+        )
+
+
+# --- record ---
+
+
+class ArchiveWriter:
+    """
+    Append-only archive of raw fetch results. Bodies go to segment files
+    (<writer>-NNNN.seg), back to back; each segment has an index (.idx) with
+    one JSON line per body: where it is, plus status, headers and the run it
+    belonged to. The index line is written after its body is flushed, so a
+    torn write leaves at most unindexed bytes at the end of a segment.
+
+    Segment names start with the writer's UTC start time and carry host and
+    pid, so several workers can record into one directory.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = FETCH_ARCHIVE_SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.writer = (
+            f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{socket.gethostname()}-{os.getpid()}"
+        )
+        self._number = 0
+        self._seg = None
+        self._idx = None
+        self._offset = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.directory, f"{self.writer}-{self._number:04d}{suffix}")
+
+    def _roll(self) -> None:
+        self._close_files()
+        self._number += 1
+        self._seg = open(self._path(SEGMENT_SUFFIX), "ab")
+        self._idx = open(self._path(INDEX_SUFFIX), "a", encoding="utf-8")
+        self._offset = self._seg.tell()
+
+    def append(self, run_id: int, fetched: FetchResult) -> None:
+        body = fetched.body or b""
+        with self._lock:
+            if self._seg is None or (self._offset and self._offset + len(body) > self.segment_bytes):
+                self._roll()
+            self._seg.write(body)
+            self._seg.flush()
+            record = {
+                "offset": self._offset,
+                "length": len(body),
+                "run_id": run_id,
+                "feed_id": fetched.feed.feed_id,
+                "feed_url": fetched.feed.feed_url,
+                "fetched_at": datetime.now(timezone.utc).isoformat(),
+                "status": fetched.status,
+                "headers": fetched.headers,
+                "href": fetched.href,
+                "error": fetched.error,
+                "elapsed_seconds": fetched.elapsed_seconds,
+            }
+            self._idx.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._idx.flush()
+            self._offset += len(body)
+
+    def recording(self, run_id: int, results: Iterable[FetchResult]) -> Iterator[FetchResult]:
+        """
+        Pass results through, archiving each one on the way.
+        """
+        for fetched in results:
+            self.append(run_id, fetched)
+            yield fetched
+
+    def _close_files(self) -> None:
+        for f in (self._seg, self._idx):
+            if f is not None:
+                f.close()
+        self._seg = self._idx = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_files()
+
+
+_writer: Optional[ArchiveWriter] = None
+_writer_lock = threading.Lock()
+
+
+def fetch_archive() -> Optional[ArchiveWriter]:
+    """
+    Process-wide writer for FETCH_ARCHIVE_DIR, or None when recording is off.
+    """
+    global _writer
+    if not FETCH_ARCHIVE_DIR:
+        return None
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ArchiveWriter(FETCH_ARCHIVE_DIR)
+                atexit.register(_writer.close)
+    return _writer
+
+
+# --- replay ---
+
+
+class ArchiveReader:
+    """
+    Reads an archive directory back: index records grouped into the runs
+    that recorded them, bodies sliced out of memory-mapped segments.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._maps: Dict[str, Tuple[object, mmap.mmap]] = {}
+
+    def _segments(self) -> List[str]:
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(INDEX_SUFFIX))
+        return [os.path.join(self.directory, n[: -len(INDEX_SUFFIX)]) for n in names]
+
+    def records(self) -> Iterator[ArchivedFetch]:
+        """
+        Every complete record, segment by segment in name order.
+        """
+        for base in self._segments():
+            segment = base + SEGMENT_SUFFIX
+            size = os.path.getsize(segment) if os.path.exists(segment) else 0
+            writer = os.path.basename(base).rsplit("-", 1)[0]
+            with open(base + INDEX_SUFFIX, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        r = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line
+                    if r["offset"] + r["length"] > size:
+                        continue
+                    yield ArchivedFetch(segment=segment, writer=writer, **r)
+
+    def runs(self) -> List[List[ArchivedFetch]]:
+        """
+        Records grouped by the run that fetched them, runs in recording order.
+        """
+        groups: Dict[Tuple[str, int], List[ArchivedFetch]] = {}
+        for r in self.records():
+            groups.setdefault((r.writer, r.run_id), []).append(r)
+        return sorted(groups.values(), key=lambda g: g[0].fetched_at)
+
+    def body(self, record: ArchivedFetch) -> bytes:
+        if record.length == 0:
+            return b""
+        entry = self._maps.get(record.segment)
+        if entry is None:
+            f = open(record.segment, "rb")
+            entry = self._maps[record.segment] = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return entry[1][record.offset : record.offset + record.length]
+
+    def close(self) -> None:
+        for f, m in self._maps.values():
+            m.close()
+            f.close()
+        self._maps.clear()
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
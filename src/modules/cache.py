@@ -0,0 +1,191 @@
+# cache.py
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+Scope = Tuple[Optional[str], Optional[str]]  # (category, feed_id) of a token; None = any
+
+
+@dataclass
+class CachedFeed:
+    """
+    A rendered response body plus the per-render headers that go with it.
+    """
+
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    scope: Scope = (None, None)
+
+
+class RenderCache:
+    """
+    Bounded LRU cache of serialized feed bodies with a TTL.
+
+    Keys are response ETags, which already encode scope, limit and the head
+    aggregate (max_run_id, max_hash, ...), so new data simply misses. Entries
+    are evicted least-recently-used first once max_bytes is exceeded.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[str, Tuple[float, CachedFeed]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedFeed]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: str, feed: CachedFeed) -> None:
+        size = len(feed.body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+            self._items[key] = (time.monotonic() + self.ttl_seconds, feed)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._items))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate(self, scope_changed: Callable[[Optional[str], Optional[str]], bool]) -> int:
+        """
+        Drop entries whose scope the predicate reports as changed. This only
+        frees memory early: keys are ETags, so stale bodies are never served.
+        """
+        with self._lock:
+            stale = [k for k, (_, f) in self._items.items() if scope_changed(*f.scope)]
+            for k in stale:
+                self._drop(k)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._items),
+                "bytes": self._bytes,
+            }
+
+    def _drop(self, key: str) -> None:
+        _, feed = self._items.pop(key)
+        self._bytes -= len(feed.body)
+
+
+class FragmentCache:
+    """
+    Bounded LRU cache of encoded per-item fragments (an RSS <item>, Atom
+    <entry> or JSON Feed item), shared by every token scope, limit and page.
+
+    Keys carry the item's content version (run_id, bumped by every update),
+    so an edited item misses and its old fragment simply ages out; nothing
+    needs invalidating.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_render(self, key: Hashable, render: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            fragment = self._items.get(key)
+            if fragment is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+        fragment = render()
+        if len(fragment) > self.max_bytes:
+            return fragment
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = fragment
+                self._bytes += len(fragment)
+                while self._bytes > self.max_bytes:
+                    _, old = self._items.popitem(last=False)
+                    self._bytes -= len(old)
+                    self.evictions += 1
+        return fragment
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._items),
+                "bytes": self._bytes,
+            }
+
+
+class HeadCache:
+    """
+    Head-summary rows per token scope, so 304s can skip the database.
+
+    Entries are invalidated by run notifications; the TTL only bounds staleness
+    if a notification is missed (e.g. while the LISTEN connection reconnects).
+    A put() carrying a generation from before the latest invalidation is
+    ignored, so a row read just before a notification can't be cached after it.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._items: Dict[Scope, Tuple[float, Dict[str, Any]]] = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, scope: Scope) -> Optional[Dict[str, Any]]:
+        item = self._items.get(scope)
+        if item is None or item[0] <= time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return item[1]
+
+    def put(self, scope: Scope, head: Dict[str, Any], generation: int) -> None:
+        if generation == self.generation:
+            self._items[scope] = (time.monotonic() + self.ttl_seconds, head)
+
+    def invalidate(self, scope_changed: Callable[[Optional[str], Optional[str]], bool]) -> None:
+        self.generation += 1
+        for scope in [s for s in self._items if scope_changed(*s)]:
+            del self._items[scope]
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._items.clear()
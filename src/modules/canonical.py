@@ -0,0 +1,59 @@
+# canonical.py
+from typing import List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from. Generic names such
+# as ref or source are left alone: sites also use them to pick the page.
+TRACKING_PARAMS = frozenset(
+    {
+        "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "twclid",
+        "mc_cid", "mc_eid", "_hsenc", "_hsmi", "mkt_tok", "oly_anon_id", "oly_enc_id",
+        "ref_src", "ref_url", "cmpid", "ncid", "sr_share", "smid",
+        "ito", "at_medium", "at_campaign", "at_custom1", "guccounter", "guce_referrer",
+        "guce_referrer_sig", "__twitter_impression", "tpcc", "taid", "soc_src", "soc_trk",
+    }
+)
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hmb_")
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url: str) -> str:
+    """
+    One spelling per article link, used to match copies of a story across feeds:
+    - http and https are the same page; scheme and host are lowercased,
+      "www." and default ports dropped
+    - tracking parameters (utm_*, fbclid, gclid, ...) removed, the rest sorted
+    - fragment and trailing slash dropped (the root path stays "/")
+    Anything that isn't an absolute http(s) URL comes back stripped only.
+    """
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname:
+        return url
+
+    host = parts.hostname.rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    if ":" in host:
+        host = f"[{host}]"
+    if port is not None and port not in (80, 443):
+        host = f"{host}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    query: List[Tuple[str, str]] = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k)
+    ]
+    query.sort()
+    return urlunsplit(("https", host, path, urlencode(query), ""))
@@ -0,0 +1,112 @@
+# compress.py
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+# brotli / zstd are used only when their modules are importable
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+ZSTD_LEVEL = 12
+
+IDENTITY = "identity"
+
+
+class _Gzip:
+    def __init__(self):
+        self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._c = zstd.ZstdCompressor(level=ZSTD_LEVEL)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+
+# Server preference order when the client rates several codings equally
+_CODERS: Dict[str, type] = {}
+if zstd is not None:
+    _CODERS["zstd"] = _Zstd
+if brotli is not None:
+    _CODERS["br"] = _Brotli
+_CODERS["gzip"] = _Gzip
+
+SUPPORTED: List[str] = list(_CODERS)
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    prefs: Dict[str, float] = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for p in params.split(";"):
+            k, _, v = p.strip().partition("=")
+            if k.strip().lower() == "q":
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        prefs[token] = q
+    return prefs
+
+
+def negotiate(accept_encoding: Optional[str]) -> str:
+    """
+    Pick the content-coding for a response: highest client q-value, ties broken
+    by SUPPORTED order. Falls back to identity.
+    """
+    if not accept_encoding:
+        return IDENTITY
+    prefs = _parse_accept_encoding(accept_encoding)
+    best: Tuple[float, int] = (0.0, 0)
+    chosen = IDENTITY
+    for rank, coding in enumerate(SUPPORTED):
+        q = prefs.get(coding, prefs.get("*", 0.0))
+        if q > 0 and (q, -rank) > best:
+            best, chosen = (q, -rank), coding
+    return chosen
+
+
+def compressor(coding: str):
+    """
+    Incremental compressor with compress(bytes) / flush() for a negotiated coding.
+    """
+    return _CODERS[coding]()
+
+
+def compress(data: bytes, coding: str) -> bytes:
+    c = compressor(coding)
+    return c.compress(data) + c.flush()
@@ -3,7 +3,7 @@ from datetime import datetime, timezone
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class FeedDef:
     """
     An individual RSS feed definition used to query an RSS feed.
@@ -17,6 +17,7 @@ class FeedDef:
     etag: Optional[str] = None
     last_modified: Optional[str] = None
     last_seen_published_dt: Optional[datetime] = None
+    body_hash: Optional[str] = None
 
     def __str__(self) -> str:
         tag = f" [{self.category}]" if self.category else ""
@@ -24,6 +25,32 @@ class FeedDef:
 
 
 @dataclass
+class FeedRunStats:
+    """
+    What happened to one feed during one run, and where the time went.
+    """
+
+    feed_id: str
+    http_status: Optional[int] = None
+    outcome: str = ""  # not-modified | same-body | xml-unchanged | unchanged | changed
+    bytes: int = 0
+    fetch_seconds: float = 0.0
+    parse_seconds: float = 0.0
+    db_seconds: float = 0.0
+    entries_seen: int = 0
+    entries_changed: int = 0
+    error: Optional[str] = None
+
+    @property
+    def error_class(self) -> Optional[str]:
+        if self.error:
+            return self.error.split(":", 1)[0]
+        if self.http_status is not None and self.http_status >= 400:
+            return f"HTTP {self.http_status}"
+        return None
+
+
+@dataclass(slots=True)
 class RssEntry:
     """
     An individual RSS feed entry/item fetched by querying the RSS feed.
@@ -34,8 +61,11 @@ class RssEntry:
     link: str = ""
     uid: str = ""
     published: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
-    summary: str = ""
+    summary: str = ""  # display summary; an excerpt when the original was long
     has_real_published: bool = False  # marks whether published came from struct_time
+    summary_hash: str = ""  # sha256 of the full sanitized summary
+    body: str = ""  # full summary, only when summary is an excerpt
+    content_key: str = ""  # sha1 of the canonical link; matches copies of a story across feeds
 
     def __str__(self) -> str:
         ts = self.published.isoformat()
@@ -0,0 +1,196 @@
+# fetcher.py
+import os
+import re
+import time
+import asyncio
+import hashlib
+import queue
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+import feedparser
+import httpx
+from dotenv import load_dotenv
+
+from src.modules.feeds import FeedDef
+
+load_dotenv()
+
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "32"))
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "2"))
+FETCH_TIMEOUT_SECONDS = float(os.getenv("FETCH_TIMEOUT_SECONDS", "30"))
+FETCH_CONNECT_TIMEOUT_SECONDS = float(os.getenv("FETCH_CONNECT_TIMEOUT_SECONDS", "10"))
+
+# Same request shape feedparser uses when it fetches a URL itself
+_BASE_HEADERS = {
+    "User-Agent": feedparser.USER_AGENT,
+    "Accept": feedparser.http.ACCEPT_HEADER,
+    "A-IM": "feed",
+}
+
+# Parts of a document that change on every request without the content
+# changing: comments (render timings, cache stamps) anywhere, and build /
+# publish / updated stamps in the channel or feed header.
+_VOLATILE_ANYWHERE = re.compile(rb"<!--.*?-->", re.DOTALL)
+_VOLATILE_HEADER = re.compile(
+    rb"<((?:\w+:)?(?:lastBuildDate|pubDate|updated|date))\b[^>]*>[^<]*</\1>"
+)
+_FIRST_ITEM = re.compile(rb"<(?:\w+:)?(?:item|entry)\b")
+
+
+def body_fingerprint(body: bytes) -> str:
+    """
+    Fast hash of a feed body with its volatile timestamps blanked out.
+    """
+    m = _FIRST_ITEM.search(body)
+    split = m.start() if m else len(body)
+    head = _VOLATILE_HEADER.sub(b"", body[:split])
+    h = hashlib.blake2b(digest_size=16)
+    h.update(_VOLATILE_ANYWHERE.sub(b"", head))
+    h.update(_VOLATILE_ANYWHERE.sub(b"", body[split:]))
+    return h.hexdigest()
+
+
+@dataclass
+class FetchResult:
+    """
+    Raw outcome of one conditional GET; parsed separately (see parser.py).
+    """
+
+    feed: FeedDef
+    status: Optional[int] = None  # None when the request never got a response
+    body: bytes = b""
+    headers: Dict[str, str] = field(default_factory=dict)  # lower-cased
+    href: str = ""
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0  # request time, excluding waits for a concurrency slot
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("etag") or None
+
+    @property
+    def modified(self) -> Optional[str]:
+        return self.headers.get("last-modified") or None
+
+    @cached_property
+    def fingerprint(self) -> Optional[str]:
+        # status is the redirect code when one was followed; the body is still the feed
+        if not self.body or self.status is None or not 200 <= self.status < 400:
+            return None
+        return body_fingerprint(self.body)
+
+    @property
+    def body_unchanged(self) -> bool:
+        """
+        A 2xx whose body matches the one processed last time (servers that
+        never answer 304).
+        """
+        return self.fingerprint is not None and self.fingerprint == self.feed.body_hash
+
+    def response_headers(self) -> Dict[str, str]:
+        """
+        Headers for feedparser.parse(), so it keeps its encoding detection and
+        resolves relative URIs against the final URL.
+        """
+        headers = dict(self.headers)
+        if self.href:
+            headers["content-location"] = urljoin(self.href, headers.get("content-location", ""))
+        return headers
+
+
+# --- request ---
+
+
+def _request_headers(feed: FeedDef) -> Dict[str, str]:
+    headers = dict(_BASE_HEADERS)
+    if feed.etag:
+        headers["If-None-Match"] = feed.etag
+    if feed.last_modified:
+        headers["If-Modified-Since"] = feed.last_modified
+    return headers
+
+
+def _status_of(resp: httpx.Response) -> int:
+    # feedparser reports the redirect code (301/302/307...) when it followed one;
+    # keep that so main's ok/failed counters see the same numbers.
+    if resp.history:
+        return resp.history[-1].status_code
+    return resp.status_code
+
+
+async def _fetch_one(
+    client: httpx.AsyncClient,
+    feed: FeedDef,
+    global_sem: asyncio.Semaphore,
+    host_sems: Dict[str, asyncio.Semaphore],
+) -> FetchResult:
+    host = urlsplit(feed.feed_url).hostname or ""
+    host_sem = host_sems.setdefault(host, asyncio.Semaphore(FETCH_PER_HOST))
+    # host slot first: a task queued behind a busy host must not hold a global slot
+    async with host_sem, global_sem:
+        started = time.perf_counter()
+        try:
+            resp = await client.get(feed.feed_url, headers=_request_headers(feed))
+        except (httpx.HTTPError, httpx.InvalidURL) as exc:
+            return FetchResult(
+                feed=feed,
+                error=f"{type(exc).__name__}: {exc}",
+                elapsed_seconds=time.perf_counter() - started,
+            )
+    return FetchResult(
+        feed=feed,
+        status=_status_of(resp),
+        body=resp.content,
+        headers={k.lower(): v for k, v in resp.headers.items()},
+        href=str(resp.url),
+        elapsed_seconds=time.perf_counter() - started,
+    )
+
+
+async def _fetch_all(feeds: List[FeedDef], out: "queue.Queue[Optional[FetchResult]]") -> None:
+    limits = httpx.Limits(
+        max_connections=FETCH_CONCURRENCY,
+        max_keepalive_connections=FETCH_CONCURRENCY,
+    )
+    timeout = httpx.Timeout(FETCH_TIMEOUT_SECONDS, connect=FETCH_CONNECT_TIMEOUT_SECONDS)
+    global_sem = asyncio.Semaphore(FETCH_CONCURRENCY)
+    host_sems: Dict[str, asyncio.Semaphore] = {}
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True) as client:
+        tasks = [_fetch_one(client, f, global_sem, host_sems) for f in feeds]
+        for fut in asyncio.as_completed(tasks):
+            out.put(await fut)
+
+
+# --- public ---
+
+
+def fetch_feeds(feeds: Iterable[FeedDef]) -> Iterator[FetchResult]:
+    """
+    Fetch all feeds concurrently and yield results as they complete.
+
+    The event loop runs on a background thread, so the caller can parse and
+    write to the DB while the remaining requests are still in flight.
+    """
+    feeds = list(feeds)
+    out: "queue.Queue[Optional[FetchResult]]" = queue.Queue()
+    errors: List[BaseException] = []
+
+    def _run():
+        try:
+            asyncio.run(_fetch_all(feeds, out))
+        except BaseException as exc:  # surfaced to the consumer below
+            errors.append(exc)
+        finally:
+            out.put(None)
+
+    t = threading.Thread(target=_run, name="feed-fetcher", daemon=True)
+    t.start()
+    while (res := out.get()) is not None:
+        yield res
+    t.join()
+    if errors:
+        raise errors[0]
@@ -0,0 +1,73 @@
+# notify.py
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import FrozenSet, Optional, Set
+
+
+@dataclass(frozen=True)
+class RunNotice:
+    """
+    Payload of a runs_notify() NOTIFY: what a finished worker run changed.
+    """
+
+    run_id: int
+    feed_ids: FrozenSet[str] = field(default_factory=frozenset)
+    categories: FrozenSet[str] = field(default_factory=frozenset)
+    all: bool = False
+
+    @classmethod
+    def from_payload(cls, payload: str) -> "RunNotice":
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return cls(run_id=0, all=True)
+        return cls(
+            run_id=int(data.get("run_id") or 0),
+            feed_ids=frozenset(data.get("feed_ids") or ()),
+            categories=frozenset(data.get("categories") or ()),
+            all=bool(data.get("all")),
+        )
+
+    def affects(self, category: Optional[str], feed_id: Optional[str]) -> bool:
+        """
+        Whether a token scope (category and/or feed_id, None = any) saw changes.
+        """
+        if self.all:
+            return True
+        if feed_id is not None:
+            return feed_id in self.feed_ids
+        if category is not None:
+            return category in self.categories
+        return bool(self.feed_ids)
+
+
+class RunBroker:
+    """
+    Fan-out of RunNotices to in-process subscribers (one queue per SSE client).
+
+    Queues are small: a subscriber that is behind already has a notice pending
+    and will re-query everything since its cursor, so extra notices are dropped.
+    """
+
+    def __init__(self, queue_size: int = 8):
+        self.queue_size = queue_size
+        self._subs: Set["asyncio.Queue[RunNotice]"] = set()
+
+    def subscribe(self) -> "asyncio.Queue[RunNotice]":
+        q: "asyncio.Queue[RunNotice]" = asyncio.Queue(self.queue_size)
+        self._subs.add(q)
+        return q
+
+    def unsubscribe(self, q: "asyncio.Queue[RunNotice]") -> None:
+        self._subs.discard(q)
+
+    def publish(self, notice: RunNotice) -> None:
+        for q in self._subs:
+            try:
+                q.put_nowait(notice)
+            except asyncio.QueueFull:
+                pass
+
+    def __len__(self) -> int:
+        return len(self._subs)
@@ -0,0 +1,501 @@
+# parser.py
+import io
+import os
+import re
+import time
+import atexit
+import hashlib
+import queue
+import threading
+import multiprocessing
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import feedparser
+from feedparser.datetimes import _parse_date as feedparser_date
+from feedparser.mixin import _FeedParserMixin
+from feedparser.sanitizer import _sanitize_html
+from feedparser.urls import _urljoin, make_safe_absolute_uri, resolve_relative_uris
+from dotenv import load_dotenv
+
+from src.modules.canonical import canonical_url
+from src.modules.feeds import RssEntry
+from src.modules.fetcher import FetchResult
+from src.modules.summary import normalize_summary
+
+load_dotenv()
+
+# 0 parses in the calling process (no pool)
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1)))
+# stream: incremental RSS/Atom reader with the waterline stop, falling back to
+# feedparser for anything it doesn't handle; full: feedparser for every document
+PARSE_MODE = os.getenv("PARSE_MODE", "stream").strip().lower()
+# Stop reading a newest-first document after this many consecutive items
+# published at or before the feed's waterline (last_seen_published_dt); 0 reads all
+PARSE_WATERLINE_STOP = int(os.getenv("PARSE_WATERLINE_STOP", "10"))
+
+# Field order of RssEntry; this is all that crosses the process boundary per entry
+EntryTuple = Tuple[str, str, str, str, datetime, str, bool, str, str, str]
+
+
+@dataclass(slots=True)
+class ParsedFeed:
+    """
+    What ingest needs from a feed document, without feedparser's dicts.
+    """
+
+    xml_updated_dt: Optional[datetime] = None  # <updated> / <lastBuildDate>
+    entries: List[EntryTuple] = field(default_factory=list)
+    parse_seconds: float = 0.0
+    stopped_early: bool = False  # items past the waterline stop were not read
+
+    def rss_entries(self) -> List[RssEntry]:
+        return [RssEntry(*t) for t in self.entries]
+
+
+# --- parse (runs in the worker processes) ---
+
+
+def _to_dt_from_struct(t) -> Optional[datetime]:
+    if isinstance(t, time.struct_time):
+        return datetime.fromtimestamp(time.mktime(t), tz=timezone.utc)
+    return None
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+def _entry_tuple(e, now: datetime) -> EntryTuple:
+    ts = e.get("published_parsed") or e.get("updated_parsed")
+    published = _to_dt_from_struct(ts)
+    link = e.get("link", "") or ""
+    summary, summary_hash, body = normalize_summary(e.get("summary", ""))
+    return (
+        _sha1(link),
+        e.get("title", ""),
+        link,
+        e.get("id", "") or e.get("guid", "") or "",
+        published if published is not None else now,
+        summary,
+        published is not None,
+        summary_hash,
+        body,
+        _sha1(canonical_url(link)) if link else "",
+    )
+
+
+class _Waterline:
+    """
+    Counts consecutive items at or below the waterline. Only trusted while the
+    document reads newest-first: one item newer than the one before it (an
+    oldest-first or unsorted feed) turns the stop off for the rest of it.
+    """
+
+    __slots__ = ("waterline", "stop_after", "streak", "prev")
+
+    def __init__(self, waterline: Optional[datetime], stop_after: int):
+        self.waterline = waterline if stop_after > 0 else None
+        self.stop_after = stop_after
+        self.streak = 0
+        self.prev: Optional[datetime] = None
+
+    def reached(self, entry: EntryTuple) -> bool:
+        if self.waterline is None:
+            return False
+        published, real = entry[4], entry[6]
+        if not real:
+            self.streak = 0
+            return False
+        if self.prev is not None and published > self.prev:
+            self.waterline = None
+            return False
+        self.prev = published
+        self.streak = self.streak + 1 if published <= self.waterline else 0
+        return self.streak >= self.stop_after
+
+
+def _parse_full(body: bytes, response_headers: Dict[str, str], mark: _Waterline) -> ParsedFeed:
+    parsed = feedparser.parse(body, response_headers=response_headers)
+    meta = parsed.get("feed", {})
+    now = datetime.now(timezone.utc)
+    out = ParsedFeed(
+        xml_updated_dt=_to_dt_from_struct(meta.get("updated_parsed") or meta.get("published_parsed"))
+    )
+    for e in parsed.get("entries") or []:
+        out.entries.append(_entry_tuple(e, now))
+        if mark.reached(out.entries[-1]):
+            out.stopped_early = True
+            break
+    return out
+
+
+def parse_document(
+    body: bytes,
+    response_headers: Dict[str, str],
+    waterline: Optional[datetime] = None,
+) -> ParsedFeed:
+    """
+    Parse one feed document and reduce it to a ParsedFeed.
+
+    In stream mode the document is read item by item and reading stops after
+    PARSE_WATERLINE_STOP consecutive items at or below waterline, so a
+    2,000-item newest-first feed costs about as much as a 20-item one.
+    Documents the streaming reader can't handle go through feedparser.
+    """
+    started = time.perf_counter()
+    out = None
+    if PARSE_MODE == "stream":
+        try:
+            stream = EntryStream(
+                body,
+                _Waterline(waterline, PARSE_WATERLINE_STOP),
+                response_headers.get("content-location", ""),  # feedparser's base URI too
+            )
+            entries = list(stream)
+            out = ParsedFeed(stream.xml_updated_dt, entries, stopped_early=stream.stopped_early)
+        except (ET.ParseError, _Unsupported):
+            out = None
+    if out is None:
+        out = _parse_full(body, response_headers, _Waterline(waterline, PARSE_WATERLINE_STOP))
+    out.parse_seconds = time.perf_counter() - started
+    return out
+
+
+# --- streaming reader ---
+
+
+class _Unsupported(Exception):
+    """The document needs feedparser (not RSS/Atom, or markup we don't map)."""
+
+
+_ITEMS = ("item", "entry")
+_CHANNELS = ("channel", "feed", "rdf_RDF")
+_FEED_UPDATED = ("lastBuildDate", "updated", "dc_date")  # before pubDate/published
+_FEED_PUBLISHED = ("pubDate", "published")
+# Elements in other namespaces that feedparser folds into the fields read here,
+# each with rules of its own (itunes:summary competes with description, dc:title
+# with title, ...); documents that use them go through feedparser
+_FOLDED = frozenset({
+    "dc_title", "dc_description", "dcterms_issued", "dcterms_modified",
+    "itunes_summary", "media_title", "media_description",
+})
+_ATOM_NS = ("{http://www.w3.org/2005/Atom}", "{http://purl.org/atom/ns#}")
+# feedparser's prefix per namespace URI: '' for RSS 0.9x/1.0/2.0 and Atom
+_NS_PREFIX = {uri.lower(): prefix for uri, prefix in _FeedParserMixin.namespaces.items()}
+_RDF_ABOUT = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about"
+_XML_BASE = "{http://www.w3.org/XML/1998/namespace}base"
+_looks_like_html = _FeedParserMixin.looks_like_html
+# Attributes feedparser's RelativeURIResolver rewrites; markup without any is left as is
+_URI_ATTR = re.compile(
+    r"\b(?:href|src|cite|background|action|longdesc|profile|usemap|classid|codebase|data|poster)\s*=",
+    re.I,
+)
+
+
+def _local(tag) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+_names: Dict[str, str] = {}
+
+
+def _name(tag) -> str:
+    """
+    The name feedparser dispatches an element on: "title" for RSS and Atom
+    elements, "content_encoded", "dc_date", ... for the namespaces it knows,
+    "" for the ones it doesn't (it ignores those).
+    """
+    if not isinstance(tag, str):
+        return ""
+    name = _names.get(tag)
+    if name is None:
+        uri, _, local = tag[1:].rpartition("}") if tag[:1] == "{" else ("", "", tag)
+        prefix = _NS_PREFIX.get(uri.lower())
+        name = _names[tag] = "" if prefix is None else f"{prefix}_{local}" if prefix else local
+    return name
+
+
+def _parse_dt(text: Optional[str]) -> Optional[datetime]:
+    text = (text or "").strip()
+    if not text:
+        return None
+    try:
+        dt = parsedate_to_datetime(text)  # RFC 822 (RSS)
+    except (TypeError, ValueError, IndexError):
+        try:
+            dt = datetime.fromisoformat(text)  # RFC 3339 (Atom, dc:date)
+        except ValueError:
+            return _to_dt_from_struct(feedparser_date(text))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _base_of(parent: str, el: ET.Element) -> str:
+    """
+    Base URI in effect inside el, tracked the way feedparser does: xml:base
+    resolves against the enclosing base, unsafe schemes are ignored.
+    """
+    rel = el.get(_XML_BASE)
+    if not rel:
+        return parent
+    return (make_safe_absolute_uri(parent, rel) or parent) if parent else _urljoin(parent, rel)
+
+
+def _html(text: str, base: str = "") -> str:
+    # same URI resolving and sanitizing feedparser applies to HTML content
+    if "<" not in text and "&" not in text:
+        return text
+    if base and _URI_ATTR.search(text):
+        text = resolve_relative_uris(text, base, "utf-8", "text/html")
+    return _sanitize_html(text, "utf-8", "text/html")
+
+
+def _content(el: ET.Element, base: str, atom: bool) -> str:
+    kind = (el.get("type") or "").lower()
+    if kind in ("xhtml", "application/xhtml+xml"):
+        raise _Unsupported("xhtml content")
+    text = (el.text or "").strip()
+    if atom:
+        # Atom declares its content type; text (the default) is literal
+        htmlish = kind in ("html", "text/html")
+    elif _local(el.tag) == "title":
+        # RSS titles are nominally plain text, but feedparser takes them as
+        # HTML when they look like it (closing tags or entity references)
+        htmlish = _looks_like_html(text)
+    else:
+        htmlish = True
+    return _html(text, base) if htmlish else text
+
+
+def _item_tuple(item: ET.Element, now: datetime, atom: bool, bases: Dict[ET.Element, str]) -> EntryTuple:
+    fields: Dict[str, str] = {}
+    link = guid = ""
+    permalink = True
+    for child in item:
+        name = _name(child.tag)
+        if name in _FOLDED:
+            raise _Unsupported(f"<{name}> in an item")
+        if not atom and name and child.tag.startswith(_ATOM_NS):
+            raise _Unsupported(f"Atom <{name}> in an RSS item")
+        base = bases.get(child, "")
+        if name == "link":
+            href = child.get("href")
+            if href is None:
+                text = (child.text or "").strip()  # RSS
+                link = link or (_urljoin(base, text) if text else "")
+            elif child.get("rel", "alternate") == "alternate" and not link:
+                link = _urljoin(base, href.strip())  # Atom
+        elif name in ("guid", "id"):
+            guid = (child.text or "").strip()
+            permalink = child.get("isPermaLink", "true").lower() != "false"
+            if permalink and guid:
+                guid = _urljoin(base, guid)  # feedparser resolves permalink guids (and Atom ids)
+        elif name in ("title", "description", "summary", "content_encoded", "content"):
+            fields.setdefault(name, _content(child, base, atom))
+        elif name in ("pubDate", "published", "dc_date", "updated"):
+            fields.setdefault(name, child.text or "")
+    guid = guid or (item.get(_RDF_ABOUT) or "").strip()  # RSS 1.0 items are identified by rdf:about
+    if not link and permalink and guid:
+        link = guid  # feedparser does the same for permalink guids
+
+    published = None
+    for name in ("pubDate", "published", "dc_date", "updated"):
+        published = _parse_dt(fields.get(name))
+        if published is not None:
+            break
+    summary, summary_hash, body = normalize_summary(
+        fields.get("description")
+        or fields.get("summary")
+        or fields.get("content_encoded")
+        or fields.get("content")
+        or ""
+    )
+    return (
+        _sha1(link),
+        fields.get("title", ""),
+        link,
+        guid,
+        published if published is not None else now,
+        summary,
+        published is not None,
+        summary_hash,
+        body,
+        _sha1(canonical_url(link)) if link else "",
+    )
+
+
+class EntryStream:
+    """
+    Incremental RSS 2.0 / RSS 1.0 / Atom reader: iterating yields one
+    EntryTuple per item, in document order, without building the whole tree
+    (each item is dropped once read). Iteration ends early when mark says
+    the waterline has been reached. Raises _Unsupported or ET.ParseError for
+    documents that should go through feedparser instead.
+
+    Relative links and URIs in HTML content are resolved against base (the
+    response's content-location) and xml:base, as feedparser does.
+    """
+
+    def __init__(self, body: bytes, mark: _Waterline, base: str = ""):
+        self.body = body
+        self.mark = mark
+        self.base = base
+        self.xml_updated_dt: Optional[datetime] = None
+        self.stopped_early = False
+
+    def __iter__(self) -> Iterator[EntryTuple]:
+        now = datetime.now(timezone.utc)
+        stack: List[ET.Element] = []
+        bases: List[str] = []  # base URI in effect at each stack level
+        item_bases: Dict[ET.Element, str] = {}  # the current item and its children
+        atom = False
+        feed_published: Optional[datetime] = None
+        try:
+            for event, el in ET.iterparse(io.BytesIO(self.body), events=("start", "end")):
+                if event == "start":
+                    if not stack:
+                        if _local(el.tag) not in ("rss", "RDF", "feed"):
+                            raise _Unsupported(f"root <{_local(el.tag)}>")
+                        atom = _local(el.tag) == "feed"
+                    base = _base_of(bases[-1] if bases else self.base, el)
+                    stack.append(el)
+                    bases.append(base)
+                    if item_bases or _name(el.tag) in _ITEMS:
+                        item_bases[el] = base
+                    continue
+                stack.pop()
+                bases.pop()
+                name = _name(el.tag)
+                parent = _name(stack[-1].tag) if stack else ""
+                if name in _ITEMS:
+                    entry = _item_tuple(el, now, atom, item_bases)
+                    item_bases.clear()
+                    if stack:
+                        stack[-1].remove(el)
+                    yield entry
+                    if self.mark.reached(entry):
+                        self.stopped_early = True
+                        return
+                elif parent in _CHANNELS and self.xml_updated_dt is None:
+                    if name in _FEED_UPDATED:
+                        self.xml_updated_dt = _parse_dt(el.text)
+                    elif name in _FEED_PUBLISHED and feed_published is None:
+                        feed_published = _parse_dt(el.text)
+        finally:
+            if self.xml_updated_dt is None:
+                self.xml_updated_dt = feed_published
+
+
+# --- pool ---
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    Process-wide parse pool, started on first use and shut down at exit.
+
+    Workers are spawned rather than forked: the parent already runs the
+    fetcher thread and the DB pool's threads.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=PARSE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                atexit.register(close_pool)
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _skip_parse(fetched: FetchResult) -> bool:
+    return fetched.status == 304 or fetched.body_unchanged
+
+
+_DONE = object()
+
+
+def parse_feeds(
+    results: Iterable[FetchResult],
+) -> Iterator[Tuple[FetchResult, Optional[ParsedFeed]]]:
+    """
+    Parse fetch results in the process pool and yield them as parses finish.
+
+    Results are submitted as they arrive, so parsing overlaps the requests
+    still in flight. 304s and bodies whose fingerprint matches the last
+    processed one come through with None; failed or empty responses with an
+    empty ParsedFeed.
+    """
+    if PARSE_WORKERS <= 0:
+        for fetched in results:
+            if _skip_parse(fetched):
+                yield fetched, None
+            elif fetched.body:
+                yield fetched, parse_document(
+                    fetched.body, fetched.response_headers(), fetched.feed.last_seen_published_dt
+                )
+            else:
+                yield fetched, ParsedFeed()
+        return
+
+    pool = _get_pool()
+    out: "queue.Queue[object]" = queue.Queue()
+    submitted = [0]
+    errors: List[BaseException] = []
+
+    def _submit():
+        try:
+            for fetched in results:
+                if _skip_parse(fetched):
+                    out.put((fetched, None))
+                elif not fetched.body:
+                    out.put((fetched, ParsedFeed()))
+                else:
+                    fut = pool.submit(
+                        parse_document,
+                        fetched.body,
+                        fetched.response_headers(),
+                        fetched.feed.last_seen_published_dt,
+                    )
+                    submitted[0] += 1
+                    fut.add_done_callback(lambda f, r=fetched: out.put((r, f)))
+        except BaseException as exc:  # surfaced to the consumer below
+            errors.append(exc)
+        finally:
+            out.put(_DONE)
+
+    t = threading.Thread(target=_submit, name="feed-parse-submit", daemon=True)
+    t.start()
+
+    finished, parsed_back = False, 0
+    while not finished or parsed_back < submitted[0]:
+        item = out.get()
+        if item is _DONE:
+            finished = True
+            continue
+        fetched, res = item
+        if isinstance(res, Future):
+            parsed_back += 1
+            res = res.result()
+        yield fetched, res
+    t.join()
+    if errors:
+        raise errors[0]
@@ -1,16 +1,40 @@
 # pgdao.py
 import os
-from typing import Any, Dict, Iterable, List, Optional, Tuple
-from datetime import datetime
+import json
+import time
+import hashlib
+import asyncio
+import atexit
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 import psycopg
+from psycopg import sql
 from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from src.modules.feeds import FeedRunStats, RssEntry
+from src.modules.metrics import REGISTRY
 
 load_dotenv()
 
 
 SQL_DIR = os.getenv("SQL_DIR", "sql")
 
+PG_POOL_MIN_SIZE = int(os.getenv("PG_POOL_MIN_SIZE", "1"))
+PG_POOL_MAX_SIZE = int(os.getenv("PG_POOL_MAX_SIZE", "10"))
+PG_POOL_TIMEOUT_SECONDS = float(os.getenv("PG_POOL_TIMEOUT_SECONDS", "30"))
+PG_POOL_MAX_IDLE_SECONDS = float(os.getenv("PG_POOL_MAX_IDLE_SECONDS", "600"))
+
+# NOTIFY channel the worker signals at the end of every run that changed data
+RUNS_CHANNEL = "rss_run_finished"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+_NOTIFY_MAX_BYTES = 7900
+
 
 # --- connection ---
 
@@ -22,47 +46,275 @@ def _dsn() -> str:
     return url
 
 
-def _connect():
-    return psycopg.connect(_dsn(), autocommit=True, row_factory=dict_row)
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ConnectionPool:
+    """
+    Process-wide pool, opened on first use and closed at interpreter exit.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _dsn(),
+                    min_size=PG_POOL_MIN_SIZE,
+                    max_size=PG_POOL_MAX_SIZE,
+                    timeout=PG_POOL_TIMEOUT_SECONDS,
+                    max_idle=PG_POOL_MAX_IDLE_SECONDS,
+                    kwargs={"autocommit": True, "row_factory": dict_row},
+                    check=ConnectionPool.check_connection,
+                    name="pgdao",
+                    open=True,
+                )
+                atexit.register(close_pool)
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+_async_pool: Optional[AsyncConnectionPool] = None
+_async_pool_lock: Optional[asyncio.Lock] = None
+
+
+async def _get_async_pool() -> AsyncConnectionPool:
+    """
+    Async counterpart of _get_pool(); bound to the event loop that first uses it.
+    """
+    global _async_pool, _async_pool_lock
+    if _async_pool is None:
+        if _async_pool_lock is None:
+            _async_pool_lock = asyncio.Lock()
+        async with _async_pool_lock:
+            if _async_pool is None:
+                pool = AsyncConnectionPool(
+                    _dsn(),
+                    min_size=PG_POOL_MIN_SIZE,
+                    max_size=PG_POOL_MAX_SIZE,
+                    timeout=PG_POOL_TIMEOUT_SECONDS,
+                    max_idle=PG_POOL_MAX_IDLE_SECONDS,
+                    kwargs={"autocommit": True, "row_factory": dict_row},
+                    check=AsyncConnectionPool.check_connection,
+                    name="pgdao-async",
+                    open=False,
+                )
+                await pool.open()
+                _async_pool = pool
+    return _async_pool
+
+
+async def open_async_pool() -> None:
+    await _get_async_pool()
+
+
+async def close_async_pool() -> None:
+    global _async_pool
+    if _async_pool is not None:
+        pool, _async_pool = _async_pool, None
+        await pool.close()
+
+
+# --- statement counters ---
+
+
+@dataclass
+class DbStats:
+    """
+    Statements executed through the file runners and time spent in them,
+    including waiting for a pooled connection. One statement is one round trip.
+    """
+
+    statements: int = 0
+    seconds: float = 0.0
+
+
+_db_stats = DbStats()
+_db_stats_lock = threading.Lock()
+
+DB_POOL_WAIT = REGISTRY.histogram(
+    "rss_db_pool_wait_seconds", "Time spent waiting for a pooled DB connection", ["pool"]
+)
+
+
+def _count_statement(seconds: float) -> None:
+    with _db_stats_lock:
+        _db_stats.statements += 1
+        _db_stats.seconds += seconds
+
+
+def db_stats() -> DbStats:
+    """
+    Snapshot of the process-wide statement counters.
+    """
+    with _db_stats_lock:
+        return DbStats(_db_stats.statements, _db_stats.seconds)
 
 
 # --- file runner ---
 
 
+@lru_cache(maxsize=None)
+def _load_sql(relpath: str) -> str:
+    path = os.path.join(SQL_DIR, relpath)
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
 def execute_sql_file(
     relpath: str, params: Tuple[Any, ...] = ()
 ) -> List[Dict[str, Any]]:
     """
     Execute an SQL file relative to SQL_DIR. Returns rows for SELECT/RETURNING; [] otherwise.
+
+    File text is read once per process. Single-statement files under queries/
+    are server-side prepared on each pooled connection; schema files may hold
+    several statements and run unprepared.
     """
-    path = os.path.join(SQL_DIR, relpath)
-    with open(path, "r", encoding="utf-8") as f:
-        sql = f.read()
-    with _connect() as conn, conn.cursor() as cur:
-        cur.execute(sql, params)
-        try:
-            rows = cur.fetchall()
-            return list(rows)
-        except psycopg.ProgrammingError:
-            # no results to fetch (e.g., UPDATE without RETURNING)
-            return []
+    sql = _load_sql(relpath)
+    prepare = relpath.startswith("queries/")
+    started = time.perf_counter()
+    try:
+        with _get_pool().connection() as conn, conn.cursor() as cur:
+            DB_POOL_WAIT.observe(time.perf_counter() - started, pool="sync")
+            cur.execute(sql, params, prepare=prepare)
+            try:
+                rows = cur.fetchall()
+                return list(rows)
+            except psycopg.ProgrammingError:
+                # no results to fetch (e.g., UPDATE without RETURNING)
+                return []
+    finally:
+        _count_statement(time.perf_counter() - started)
+
+
+async def execute_sql_file_async(
+    relpath: str, params: Tuple[Any, ...] = ()
+) -> List[Dict[str, Any]]:
+    """
+    Async variant of execute_sql_file() on the shared AsyncConnectionPool.
+    """
+    sql = _load_sql(relpath)
+    prepare = relpath.startswith("queries/")
+    started = time.perf_counter()
+    try:
+        async with (await _get_async_pool()).connection() as conn, conn.cursor() as cur:
+            DB_POOL_WAIT.observe(time.perf_counter() - started, pool="async")
+            await cur.execute(sql, params, prepare=prepare)
+            if cur.description is None:
+                return []
+            return list(await cur.fetchall())
+    finally:
+        _count_statement(time.perf_counter() - started)
+
+
+async def listen_async(
+    channel: str, on_listen: Optional[Callable[[], None]] = None
+) -> AsyncIterator[str]:
+    """
+    Yield NOTIFY payloads from a dedicated (unpooled) connection LISTENing on channel.
+    on_listen runs once LISTEN is in effect, e.g. to drop state that may have
+    missed notifications. Connection errors propagate so the caller can retry.
+    """
+    conn = await psycopg.AsyncConnection.connect(_dsn(), autocommit=True)
+    async with conn:
+        await conn.execute(sql.SQL("listen {}").format(sql.Identifier(channel)))
+        if on_listen is not None:
+            on_listen()
+        async for n in conn.notifies():
+            yield n.payload
 
 
-# --- schema helpers (optional convenience) ---
+# --- schema migrations ---
 
+# Serializes concurrent migrators (e.g. two init containers started together)
+_MIGRATION_LOCK_KEY = 0x7255_0001
+# Held by the one worker that runs retention when several share the database
+RETENTION_LOCK_KEY = 0x7255_0002
 
-def apply_schema() -> None:
-    execute_sql_file("schema/001_create_table_runs.sql")
-    execute_sql_file("schema/002_create_table_feed_register.sql")
-    execute_sql_file("schema/003_create_table_feed_data.sql")
-    execute_sql_file("schema/010_create_indexes.sql")
+
+def schema_migrations() -> List[Tuple[int, str]]:
+    """
+    (version, file name) of every schema/NNN_*.sql migration, in order.
+    000_* files are setup/teardown helpers and not versioned.
+    """
+    out: Dict[int, str] = {}
+    for name in sorted(os.listdir(os.path.join(SQL_DIR, "schema"))):
+        prefix = name.split("_", 1)[0]
+        if not (name.endswith(".sql") and prefix.isdigit()) or int(prefix) == 0:
+            continue
+        if int(prefix) in out:
+            raise RuntimeError(f"schema/{name}: version {prefix} already used by {out[int(prefix)]}")
+        out[int(prefix)] = name
+    return sorted(out.items())
+
+
+def apply_schema() -> List[str]:
+    """
+    Apply the schema/ migrations not yet recorded in schema_version, in version
+    order; each file and its schema_version row commit together. Returns the
+    applied file names ([] when up to date).
+
+    Migrations are append-only: add a new NNN_*.sql rather than editing an
+    applied one (an edited file is reported, not re-run). Each one is also
+    safe to run again over its own result.
+
+    Feed tables from before versioned migrations don't match what 001-0xx
+    expect; they are dropped once (rss_keys is kept), as the old init_db did
+    on every start, and rebuilt.
+    """
+    applied: List[str] = []
+    with psycopg.connect(_dsn(), autocommit=True, row_factory=dict_row) as conn:
+        conn.execute("select pg_advisory_lock(%s)", (_MIGRATION_LOCK_KEY,))
+        conn.execute(_load_sql("schema/000_create_table_schema_version.sql"), ())
+        if conn.execute(_load_sql("queries/schema_is_legacy.sql"), ()).fetchone()["legacy"]:
+            print("⚠️ Feed tables predate schema_version; dropping them once (rss_keys kept)")
+            with conn.transaction():
+                conn.execute(_load_sql("schema/000_drop_tables.sql"), ())
+                conn.execute(_load_sql("schema/000_create_table_schema_version.sql"), ())
+        done = {r["version"]: r for r in conn.execute(_load_sql("queries/schema_version_get.sql"), ())}
+        for version, name in schema_migrations():
+            text = _load_sql(f"schema/{name}")
+            checksum = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            if version in done:
+                if done[version]["checksum"] != checksum:
+                    print(f"⚠️ schema/{name} changed after it was applied; add a new migration instead")
+                continue
+            with conn.transaction():
+                conn.execute(text, ())
+                conn.execute(_load_sql("queries/schema_version_insert.sql"), (version, name, checksum))
+            applied.append(name)
+    return applied
+
+
+@contextmanager
+def try_advisory_lock(key: int) -> Iterator[bool]:
+    """
+    Try to take a session advisory lock on a dedicated connection and hold it
+    for the with block. Yields False (without waiting) when another session
+    holds it.
+    """
+    with psycopg.connect(_dsn(), autocommit=True, row_factory=dict_row) as conn:
+        locked = conn.execute("select pg_try_advisory_lock(%s) as locked", (key,)).fetchone()["locked"]
+        try:
+            yield bool(locked)
+        finally:
+            if locked:
+                conn.execute("select pg_advisory_unlock(%s)", (key,))
 
 
 # --- RUNS ---
 
 
-def runs_start() -> int:
-    rows = execute_sql_file("queries/runs_start.sql")
+def runs_start(worker: Optional[str] = None) -> int:
+    rows = execute_sql_file("queries/runs_start.sql", (worker,))
     return int(rows[0]["run_id"])
 
 
@@ -92,6 +344,47 @@ def runs_finish(
     )
 
 
+def runs_notify(run_id: int, changed: Optional[Dict[str, str]]) -> None:
+    """
+    NOTIFY listeners which feeds (feed_id -> category) a finished run changed.
+    changed=None, or lists that don't fit in one payload, send {"all": true}.
+    """
+    payload = json.dumps(
+        {
+            "run_id": run_id,
+            "feed_ids": sorted(changed or ()),
+            "categories": sorted(set((changed or {}).values())),
+        }
+    )
+    if changed is None or len(payload.encode("utf-8")) > _NOTIFY_MAX_BYTES:
+        payload = json.dumps({"run_id": run_id, "all": True})
+    execute_sql_file("queries/runs_notify.sql", (RUNS_CHANNEL, payload))
+
+
+def feed_run_metrics_insert_batch(run_id: int, stats: List[FeedRunStats]) -> None:
+    """
+    Record every feed's FeedRunStats for a run in one statement.
+    """
+    if not stats:
+        return
+    execute_sql_file(
+        "queries/feed_run_metrics_insert_batch.sql",
+        (
+            run_id,
+            [s.feed_id for s in stats],
+            [s.http_status for s in stats],
+            [s.outcome for s in stats],
+            [s.bytes for s in stats],
+            [s.fetch_seconds for s in stats],
+            [s.parse_seconds for s in stats],
+            [s.db_seconds for s in stats],
+            [s.entries_seen for s in stats],
+            [s.entries_changed for s in stats],
+            [s.error_class for s in stats],
+        ),
+    )
+
+
 # --- FEED_REGISTER ---
 
 
@@ -99,6 +392,57 @@ def feeds_get_enabled() -> List[Dict[str, Any]]:
     return execute_sql_file("queries/feeds_get_enabled.sql")
 
 
+def feeds_get_by_ids(feed_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Current rows of the given (still enabled) feeds.
+    """
+    return execute_sql_file("queries/feeds_get_by_ids.sql", (list(feed_ids),))
+
+
+def feed_register_claim(
+    owner: str, horizon: datetime, limit: int, lease_seconds: float
+) -> List[Dict[str, Any]]:
+    """
+    Lease up to limit feeds due by horizon to owner, earliest first, and
+    return their rows. Feeds leased by other workers are skipped; a lease
+    not released within lease_seconds lapses and the feed is claimable again.
+    """
+    return execute_sql_file(
+        "queries/feed_register_claim.sql", (horizon, limit, owner, float(lease_seconds))
+    )
+
+
+def feed_register_next_due() -> Optional[datetime]:
+    """
+    Earliest time any enabled feed can be claimed, or None without feeds.
+    """
+    rows = execute_sql_file("queries/feed_register_next_due.sql")
+    return rows[0]["next_due_at"] if rows else None
+
+
+def feed_register_schedule_batch(states: Dict[str, Any], owner: Optional[str] = None) -> None:
+    """
+    Persist scheduler PollStates, keyed by feed_id, in one statement and
+    release the leases on them. With owner set, feeds now leased by another
+    worker (owner's lease lapsed) are left untouched.
+    """
+    if not states:
+        return
+    ids = list(states)
+    execute_sql_file(
+        "queries/feed_register_schedule_batch.sql",
+        (
+            ids,
+            [states[f].next_due_at for f in ids],
+            [states[f].poll_interval_seconds for f in ids],
+            [states[f].error_count for f in ids],
+            [states[f].not_modified_streak for f in ids],
+            [states[f].last_changed_at for f in ids],
+            owner, owner,
+        ),
+    )
+
+
 def feed_register_upsert(
     feed_id: str,
     feed_url: str,
@@ -119,6 +463,23 @@ def feed_register_upsert(
     )
 
 
+def feed_register_sync(feeds: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Diff the full feed list (feed_id, feed_url, category, enabled) against
+    feed_register in one statement; see feed_register_sync.sql.
+    """
+    rows = execute_sql_file(
+        "queries/feed_register_sync.sql",
+        (
+            [f["feed_id"] for f in feeds],
+            [f["feed_url"] for f in feeds],
+            [f["category"] for f in feeds],
+            [f["enabled"] for f in feeds],
+        ),
+    )
+    return dict(rows[0])
+
+
 def feed_register_update_state(
     feed_id: str,
     *,
@@ -127,16 +488,13 @@ def feed_register_update_state(
     last_seen_published_dt: datetime | None,
     feed_xml_updated_dt: datetime | None,  # NEW
     last_run_id: int | None,
+    body_hash: str | None,
 ) -> None:
     execute_sql_file(
         "queries/feed_register_update_state.sql",
-        (etag, last_modified, last_seen_published_dt, feed_xml_updated_dt, last_run_id, feed_id),
+        (etag, last_modified, last_seen_published_dt, feed_xml_updated_dt, last_run_id, body_hash, feed_id),
     )
 
-def feed_data_count_by_run(feed_id: str, run_id: int) -> int:
-    rows = execute_sql_file("queries/feed_data_count_by_run.sql", (feed_id, run_id))
-    return int(rows[0]["c"]) if rows else 0
-
 def feed_data_all_by_run(run_id: int):
     return execute_sql_file("queries/feed_data_all_by_run.sql", (run_id,))
 
@@ -144,55 +502,202 @@ def feed_data_all_by_run(run_id: int):
 # --- FEED_DATA ---
 
 
-def feed_data_upsert(
+_known_partitions: set = set()  # (year, month) of feed_data partitions known to exist
+
+
+def _month(dt: datetime) -> Tuple[int, int]:
+    utc = dt.astimezone(timezone.utc) if dt.tzinfo else dt
+    return utc.year, utc.month
+
+
+def feed_data_ensure_partitions(published: Iterable[datetime]) -> None:
+    """
+    Create the monthly feed_data partitions these timestamps fall into, if
+    this process hasn't already seen them.
+    """
+    missing = {}
+    for dt in published:
+        m = _month(dt)
+        if m not in _known_partitions:
+            missing[m] = dt
+    if missing:
+        execute_sql_file("queries/feed_data_ensure_partitions.sql", (list(missing.values()),))
+        _known_partitions.update(missing)
+
+
+def feed_data_forget_partitions() -> None:
+    """
+    Drop the known-partition cache (after retention dropped some).
+    """
+    _known_partitions.clear()
+
+
+def feed_data_upsert_batch(
     *,
     feed_id: str,
+    category: str,
     run_id: int,
-    sha1_hash: str,
-    uid: Optional[str],
-    link: str,
-    title: Optional[str],
-    summary: Optional[str],
-    published_dt: datetime,
-    has_real_published: bool,
-) -> None:
+    entries: Iterable[RssEntry],
+    min_published_dt: Optional[datetime] = None,
+) -> Tuple[int, int]:
+    """
+    Upsert all of a feed's entries in one statement. Returns (inserted, updated).
+
+    Entries published before min_published_dt (the retention cutoff) are
+    ignored, so pruned items don't come back while a feed still lists them.
+    """
+    cols: Tuple[List[Any], ...] = ([], [], [], [], [], [], [], [], [], [])
+    for e in entries:
+        cols[0].append(e.sha1_hash)
+        cols[1].append(e.uid or None)
+        cols[2].append(e.link)
+        cols[3].append(e.title or None)
+        cols[4].append(e.summary or None)
+        cols[5].append(e.published)
+        cols[6].append(bool(e.has_real_published))
+        cols[7].append(e.summary_hash or None)
+        cols[8].append(e.body or None)
+        cols[9].append(e.content_key or None)
+    if not cols[0]:
+        return 0, 0
+    kept = [dt for dt in cols[5] if min_published_dt is None or dt >= min_published_dt]
+    if not kept:
+        return 0, 0
+    params = (*cols, feed_id, category, run_id, min_published_dt, min_published_dt)
+    feed_data_ensure_partitions(kept)
+    try:
+        rows = execute_sql_file("queries/feed_data_upsert_batch.sql", params)
+    except psycopg.errors.CheckViolation:
+        # "no partition of relation feed_data found for row": another process
+        # dropped a partition this one still had cached
+        feed_data_forget_partitions()
+        feed_data_ensure_partitions(kept)
+        rows = execute_sql_file("queries/feed_data_upsert_batch.sql", params)
+    return (int(rows[0]["inserted"]), int(rows[0]["updated"])) if rows else (0, 0)
+
+def feed_data_content_key_missing(after_id: int, limit: int) -> List[Dict[str, Any]]:
+    """
+    Up to limit items after after_id (id order) that have a link but no
+    content_key: rows stored before content_key existed.
+    """
+    return execute_sql_file("queries/feed_data_content_key_missing.sql", (after_id, limit))
+
+def feed_data_content_key_set(rows: List[Dict[str, Any]]) -> None:
+    """
+    Store sha1_hash and content_key for rows of
+    {"id", "published_dt", "sha1_hash", "content_key"}.
+    """
+    if not rows:
+        return
     execute_sql_file(
-        "queries/feed_data_upsert.sql",
+        "queries/feed_data_content_key_set.sql",
         (
-            feed_id,
-            run_id,
-            sha1_hash,
-            uid,
-            link,
-            title,
-            summary,
-            published_dt,
-            has_real_published,
+            [r["id"] for r in rows],
+            [r["published_dt"] for r in rows],
+            [r["sha1_hash"] for r in rows],
+            [r["content_key"] for r in rows],
         ),
     )
 
+def feed_data_drop_partitions(cutoff: datetime, detach: bool = False) -> List[str]:
+    """
+    Drop (or detach) partitions ending on or before cutoff. Returns their names.
+    """
+    rows = execute_sql_file("queries/feed_data_drop_partitions.sql", (cutoff, detach))
+    return [r["partition"] for r in rows]
+
+
+def feed_data_prune(cutoff: datetime, category: Optional[str], exclude: List[str] = ()) -> Dict[str, int]:
+    """
+    Delete items older than cutoff: in one category, or (category=None) in
+    every category not listed in exclude. Returns removed counts per feed_id.
+    """
+    if category is not None:
+        rows = execute_sql_file("queries/feed_data_prune_category.sql", (cutoff, category))
+    else:
+        rows = execute_sql_file("queries/feed_data_prune_default.sql", (cutoff, list(exclude)))
+    return {r["feed_id"]: int(r["removed"]) for r in rows}
+
+
+# --- HEAD SUMMARIES (feed_head / scope_head) ---
+
+
+def feed_head_refresh(feed_id: str) -> None:
+    execute_sql_file("queries/feed_head_refresh.sql", (feed_id, feed_id))
+
+def feed_head_feed_ids() -> List[str]:
+    return [r["feed_id"] for r in execute_sql_file("queries/feed_head_feed_ids.sql")]
+
+def scope_head_refresh() -> None:
+    execute_sql_file("queries/scope_head_refresh.sql")
+
 # --- RSS keys (token security) ---
 
-def rss_key_get(token: str):
-    rows = execute_sql_file("queries/rss_key_get.sql", (token,))
+def rss_keys_count() -> int:
+    return int(execute_sql_file("queries/rss_keys_count.sql")[0]["n"])
+
+
+# --- RSS feed queries (aggregate + items) ---
+
+_EMPTY_HEAD = {"max_published_dt": None, "max_run_id": None, "total_items": 0, "max_hash": None}
+
+
+# --- async variants for the API ---
+
+async def rss_key_get_async(token: str):
+    rows = await execute_sql_file_async("queries/rss_key_get.sql", (token,))
     return rows[0] if rows else None
 
-def rss_key_touch(token: str) -> None:
-    execute_sql_file("queries/rss_key_touch.sql", (token,))
+async def rss_key_touch_batch_async(tokens: List[str], used_at: List[datetime]) -> None:
+    await execute_sql_file_async("queries/rss_key_touch_batch.sql", (tokens, used_at))
 
+async def rss_head_summary_async(category: str | None, feed_id: str | None):
+    rows = await execute_sql_file_async(
+        "queries/rss_head_summary.sql",
+        (feed_id, feed_id, category, category, feed_id, category),
+    )
+    return rows[0] if rows else dict(_EMPTY_HEAD)
+
+async def rss_select_items_async(
+    category: str | None,
+    feed_id: str | None,
+    limit: int,
+    before: Tuple[datetime, int] | None = None,
+    query: str | None = None,
+    full: bool = False,
+):
+    before_dt, before_id = before or (None, None)
+    return await execute_sql_file_async(
+        "queries/rss_select_items.sql",
+        (
+            full,  # full_content bodies
+            category, category, feed_id, feed_id, query, query,
+            feed_id, category, category,  # duplicate collapse
+            before_dt, before_dt, before_id, limit,
+        ),
+    )
 
-# --- RSS feed queries (aggregate + items) ---
+async def rss_select_items_since_async(
+    category: str | None,
+    feed_id: str | None,
+    limit: int,
+    since: Tuple[int, int],
+    query: str | None = None,
+    full: bool = False,
+):
+    return await execute_sql_file_async(
+        "queries/rss_select_items_since.sql",
+        (
+            full,  # full_content bodies
+            category, category, feed_id, feed_id, query, query,
+            feed_id, category, category,  # duplicate collapse
+            since[0], since[1], limit,
+        ),
+    )
 
-def rss_head_aggregate(category: str | None, feed_id: str | None):
-    # Pass each nullable param twice to match the SQL (%s is null or field = %s)
-    rows = execute_sql_file(
-        "queries/rss_head_aggregate.sql",
+async def rss_latest_cursor_async(category: str | None, feed_id: str | None) -> Tuple[int, int]:
+    rows = await execute_sql_file_async(
+        "queries/rss_latest_cursor.sql",
         (category, category, feed_id, feed_id),
     )
-    return rows[0] if rows else {"max_published_dt": None, "max_run_id": None, "total_items": 0, "max_hash": None}
-
-def rss_select_items(category: str | None, feed_id: str | None, limit: int):
-    return execute_sql_file(
-        "queries/rss_select_items.sql",
-        (category, category, feed_id, feed_id, limit),
-    )
\ No newline at end of file
+    return (rows[0]["run_id"], rows[0]["id"]) if rows else (0, 0)
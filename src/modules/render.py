@@ -0,0 +1,263 @@
+# render.py
+import json
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from src.modules.cache import FragmentCache
+
+# Flush the output buffer once it grows past this many bytes
+CHUNK_BYTES = 16 * 1024
+
+MEDIA_TYPES = {
+    "rss": "application/rss+xml; charset=utf-8",
+    "atom": "application/atom+xml; charset=utf-8",
+    "json": "application/feed+json; charset=utf-8",
+}
+
+_XML_DECL = b"<?xml version='1.0' encoding='UTF-8'?>\n"
+_RSS_OPEN = (
+    b'<rss xmlns:atom="http://www.w3.org/2005/Atom" '
+    b'xmlns:content="http://purl.org/rss/1.0/modules/content/" version="2.0"><channel>'
+)
+_RSS_DOCS = b"<docs>http://www.rssboard.org/rss-specification</docs>"
+_GENERATOR = "python-feedgen"  # kept so readers see the same channel as before
+
+# Characters XML 1.0 cannot carry at all (lxml/feedgen refused these outright)
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+# --- escaping ---
+
+
+def _text(value: str) -> str:
+    """
+    Escape element text exactly like lxml serializes it.
+    """
+    value = _XML_INVALID.sub("", value)
+    return (
+        value.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace("\r", "&#13;")
+    )
+
+
+def _attr(value: str) -> str:
+    return _text(value).replace('"', "&quot;").replace("\n", "&#10;").replace("\t", "&#9;")
+
+
+def _to_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _rfc822(dt: datetime) -> str:
+    return format_datetime(dt)
+
+
+def _buffered(parts: Iterable[bytes]) -> Iterator[bytes]:
+    buf: List[bytes] = []
+    size = 0
+    for p in parts:
+        buf.append(p)
+        size += len(p)
+        if size >= CHUNK_BYTES:
+            yield b"".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+# --- item fields (same fallbacks the FeedGenerator path used) ---
+
+
+def _title(r: Dict[str, Any]) -> str:
+    return r.get("title") or r.get("link") or "(untitled)"
+
+
+def _guid(r: Dict[str, Any]) -> str:
+    return r.get("sha1_hash") or r.get("link") or ""
+
+
+# --- RSS 2.0 ---
+
+
+def rss_item(r: Dict[str, Any]) -> str:
+    out = ["<item><title>", _text(_title(r)), "</title>"]
+    link = r.get("link") or ""
+    if link:
+        out += ["<link>", _text(link), "</link>"]
+    summary = r.get("summary") or ""
+    if summary:
+        out += ["<description>", _text(summary), "</description>"]
+    out += ['<guid isPermaLink="false">', _text(_guid(r)), "</guid>"]
+    cat = r.get("category") or ""
+    if cat:
+        out += ["<category>", _text(cat), "</category>"]
+    pubdt = _to_utc(r.get("published_dt"))
+    if pubdt:
+        out += ["<pubDate>", _rfc822(pubdt), "</pubDate>"]
+    out.append("</item>")
+    return "".join(out)
+
+
+def rss_chunks(
+    *,
+    title: str,
+    link: str,
+    description: str,
+    last_build: Optional[datetime],
+    rows: List[Dict[str, Any]],
+    fragments: Optional[FragmentCache] = None,
+    variant: str = "",
+) -> Iterator[bytes]:
+    """
+    RSS 2.0 document matching feedgen's rss_str(pretty=False) byte for byte.
+
+    feedgen prepends each added entry, so the newest-first rows come out
+    oldest first; that order is preserved here.
+    """
+    build = _to_utc(last_build) or datetime.now(timezone.utc)
+    yield _XML_DECL + _RSS_OPEN + (
+        f"<title>{_text(title)}</title>"
+        f"<link>{_text(link)}</link>"
+        f"<description>{_text(description)}</description>"
+    ).encode("utf-8") + _RSS_DOCS + (
+        f"<generator>{_GENERATOR}</generator>"
+        f"<lastBuildDate>{_rfc822(build)}</lastBuildDate>"
+    ).encode("utf-8")
+    yield from _buffered(item_fragment("rss", r, fragments, variant) for r in reversed(rows))
+    yield b"</channel></rss>"
+
+
+# --- Atom 1.0 ---
+
+
+def atom_entry(r: Dict[str, Any]) -> str:
+    out = [
+        "<entry><id>urn:sha1:", _text(_guid(r)), "</id>",
+        "<title>", _text(_title(r)), "</title>",
+    ]
+    pubdt = _to_utc(r.get("published_dt"))
+    if pubdt:
+        stamp = pubdt.isoformat()
+        out += ["<updated>", stamp, "</updated><published>", stamp, "</published>"]
+    link = r.get("link") or ""
+    if link:
+        out += ['<link href="', _attr(link), '" rel="alternate"/>']
+    summary = r.get("summary") or ""
+    if summary:
+        out += ['<summary type="html">', _text(summary), "</summary>"]
+    cat = r.get("category") or ""
+    if cat:
+        out += ['<category term="', _attr(cat), '"/>']
+    out.append("</entry>")
+    return "".join(out)
+
+
+def atom_chunks(
+    *,
+    feed_url: str,
+    title: str,
+    link: str,
+    description: str,
+    last_build: Optional[datetime],
+    rows: List[Dict[str, Any]],
+    fragments: Optional[FragmentCache] = None,
+    variant: str = "",
+) -> Iterator[bytes]:
+    """
+    Atom 1.0 document over the same rows, newest entry first.
+    """
+    build = _to_utc(last_build) or datetime.now(timezone.utc)
+    yield _XML_DECL + (
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f"<id>{_text(feed_url)}</id>"
+        f"<title>{_text(title)}</title>"
+        f"<updated>{build.isoformat()}</updated>"
+        f'<link href="{_attr(link)}" rel="alternate"/>'
+        f'<link href="{_attr(feed_url)}" rel="self"/>'
+        f"<generator>{_GENERATOR}</generator>"
+        f"<subtitle>{_text(description)}</subtitle>"
+    ).encode("utf-8")
+    yield from _buffered(item_fragment("atom", r, fragments, variant) for r in rows)
+    yield b"</feed>"
+
+
+# --- JSON Feed 1.1 ---
+
+
+def json_item(r: Dict[str, Any]) -> str:
+    item: Dict[str, Any] = {"id": _guid(r), "title": _title(r)}
+    if r.get("link"):
+        item["url"] = r["link"]
+    if r.get("summary"):
+        item["content_html"] = r["summary"]
+    pubdt = _to_utc(r.get("published_dt"))
+    if pubdt:
+        item["date_published"] = pubdt.isoformat()
+    if r.get("category"):
+        item["tags"] = [r["category"]]
+    return json.dumps(item, ensure_ascii=False)
+
+
+def json_chunks(
+    *,
+    feed_url: str,
+    title: str,
+    link: str,
+    description: str,
+    rows: List[Dict[str, Any]],
+    fragments: Optional[FragmentCache] = None,
+    variant: str = "",
+) -> Iterator[bytes]:
+    """
+    JSON Feed 1.1 document over the same rows, newest item first.
+    """
+    head = json.dumps(
+        {
+            "version": "https://jsonfeed.org/version/1.1",
+            "title": title,
+            "home_page_url": link,
+            "feed_url": feed_url,
+            "description": description,
+        },
+        ensure_ascii=False,
+    )
+    # open the object back up to append the streamed items array
+    yield (head[:-1] + ', "items": [').encode("utf-8")
+    yield from _buffered(_separated(item_fragment("json", r, fragments, variant) for r in rows))
+    yield b"]}"
+
+
+def _separated(parts: Iterable[bytes], sep: bytes = b", ") -> Iterator[bytes]:
+    for i, p in enumerate(parts):
+        if i:
+            yield sep
+        yield p
+
+
+# --- item fragments ---
+
+_ITEM_RENDERERS = {"rss": rss_item, "atom": atom_entry, "json": json_item}
+
+
+def item_fragment(
+    kind: str, r: Dict[str, Any], fragments: Optional[FragmentCache] = None, variant: str = ""
+) -> bytes:
+    """
+    One encoded item ("rss", "atom" or "json"), taken from fragments when
+    given. The key is the item's identity and content version (run_id) plus
+    category, which a feed re-categorization changes without a new run;
+    variant separates renderings of other row shapes (e.g. full summaries).
+    Rows without run_id are rendered every time.
+    """
+    render = _ITEM_RENDERERS[kind]
+    run_id = r.get("run_id")
+    if fragments is None or run_id is None:
+        return render(r).encode("utf-8")
+    key = (kind, variant, r.get("feed_id"), r.get("sha1_hash"), run_id, r.get("category"))
+    return fragments.get_or_render(key, lambda: render(r).encode("utf-8"))
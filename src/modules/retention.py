@@ -0,0 +1,100 @@
+# retention.py
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from src.modules.pgdao import (
+    feed_data_drop_partitions,
+    feed_data_forget_partitions,
+    feed_data_prune,
+    feed_head_feed_ids,
+    feed_head_refresh,
+    runs_notify,
+    scope_head_refresh,
+)
+
+load_dotenv()
+
+
+def _parse_days_by_category(raw: str) -> Dict[str, int]:
+    """
+    "ai=30,news=14" -> {"ai": 30, "news": 14}
+    """
+    out: Dict[str, int] = {}
+    for part in raw.split(","):
+        cat, sep, days = part.partition("=")
+        if sep and cat.strip():
+            out[cat.strip()] = int(days)
+    return out
+
+
+# Days of items to keep (by published_dt); 0 keeps everything
+FEED_RETENTION_DAYS = int(os.getenv("FEED_RETENTION_DAYS", "0"))
+FEED_RETENTION_DAYS_BY_CATEGORY = _parse_days_by_category(os.getenv("FEED_RETENTION_DAYS_BY_CATEGORY", ""))
+# Detach expired partitions (left as standalone tables) instead of dropping them
+FEED_RETENTION_DETACH = os.getenv("FEED_RETENTION_DETACH", "false").strip().lower() == "true"
+
+
+def _days_for(category: str) -> int:
+    return FEED_RETENTION_DAYS_BY_CATEGORY.get(category, FEED_RETENTION_DAYS)
+
+
+def cutoff_for(category: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Oldest published_dt kept for a category, or None when it keeps everything.
+    """
+    days = _days_for(category)
+    if days <= 0:
+        return None
+    return (now or datetime.now(timezone.utc)) - timedelta(days=days)
+
+
+def prune(now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Apply retention:
+    - partitions older than the longest retention in use are dropped whole
+    - categories with shorter retention lose their older rows inside the
+      remaining partitions (the delete only touches those old partitions)
+    Head summaries of affected feeds are refreshed afterwards and listeners
+    are notified as after a worker run.
+    """
+    now = now or datetime.now(timezone.utc)
+    all_days = [FEED_RETENTION_DAYS, *FEED_RETENTION_DAYS_BY_CATEGORY.values()]
+
+    dropped = []
+    if min(all_days) > 0:
+        horizon = now - timedelta(days=max(all_days))
+        dropped = feed_data_drop_partitions(horizon, FEED_RETENTION_DETACH)
+        if dropped:
+            feed_data_forget_partitions()
+
+    removed: Dict[str, int] = {}
+    for category, days in FEED_RETENTION_DAYS_BY_CATEGORY.items():
+        if days > 0:
+            for fid, n in feed_data_prune(now - timedelta(days=days), category).items():
+                removed[fid] = removed.get(fid, 0) + n
+    if FEED_RETENTION_DAYS > 0:
+        exclude = list(FEED_RETENTION_DAYS_BY_CATEGORY)
+        for fid, n in feed_data_prune(now - timedelta(days=FEED_RETENTION_DAYS), None, exclude).items():
+            removed[fid] = removed.get(fid, 0) + n
+
+    affected = feed_head_feed_ids() if dropped else list(removed)
+    for fid in affected:
+        feed_head_refresh(fid)
+    if affected:
+        scope_head_refresh()
+        # Not a worker run (run_id 0); API caches and SSE scopes re-check everything
+        runs_notify(0, None)
+
+    verb = "detached" if FEED_RETENTION_DETACH else "dropped"
+    print(
+        f"🧹 retention | {verb} {len(dropped)} partition(s)  "
+        f"🗑️ {sum(removed.values())} item(s) from {len(removed)} feed(s)"
+    )
+    return {"partitions": len(dropped), "items": sum(removed.values())}
+
+
+if __name__ == "__main__":
+    prune()
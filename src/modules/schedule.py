@@ -0,0 +1,154 @@
+# schedule.py
+import os
+import random
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Starting interval for feeds without any history yet
+SCHED_DEFAULT_INTERVAL_SECONDS = int(
+    os.getenv("SCHED_DEFAULT_INTERVAL_SECONDS", str(int(os.getenv("FETCH_INTERVAL_MINUTES", "30")) * 60))
+)
+SCHED_MIN_INTERVAL_SECONDS = int(os.getenv("SCHED_MIN_INTERVAL_SECONDS", "300"))
+SCHED_MAX_INTERVAL_SECONDS = int(os.getenv("SCHED_MAX_INTERVAL_SECONDS", "86400"))
+SCHED_MAX_BACKOFF_SECONDS = int(os.getenv("SCHED_MAX_BACKOFF_SECONDS", "21600"))
+SCHED_JITTER = float(os.getenv("SCHED_JITTER", "0.1"))
+
+# Interval growth per unchanged poll once a feed has been quiet twice in a row
+_QUIET_GROWTH = 1.5
+# Aim for this many polls per observed change period
+_POLLS_PER_CHANGE = 2
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*(?:s-)?max-age\s*=\s*\"?(\d+)", re.IGNORECASE)
+
+
+@dataclass
+class PollState:
+    """
+    Per-feed scheduling columns of feed_register.
+    """
+
+    next_due_at: datetime
+    poll_interval_seconds: int
+    error_count: int = 0
+    not_modified_streak: int = 0
+    last_changed_at: Optional[datetime] = None
+
+
+# --- response hints ---
+
+
+def _max_age(headers: Dict[str, str]) -> Optional[int]:
+    cc = headers.get("cache-control") or ""
+    if "no-cache" in cc.lower() or "no-store" in cc.lower():
+        return None
+    m = _MAX_AGE.search(cc)
+    return int(m.group(1)) if m else None
+
+
+def _retry_after(headers: Dict[str, str], now: datetime) -> Optional[int]:
+    value = (headers.get("retry-after") or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        return None
+    return max(0, int((when - now).total_seconds()))
+
+
+def _clamp(seconds: float) -> int:
+    return int(min(max(seconds, SCHED_MIN_INTERVAL_SECONDS), SCHED_MAX_INTERVAL_SECONDS))
+
+
+def _jittered(seconds: float) -> timedelta:
+    # spread feeds that share an interval so they don't all come due together
+    return timedelta(seconds=seconds * random.uniform(1 - SCHED_JITTER, 1 + SCHED_JITTER))
+
+
+# --- policy ---
+
+
+def initial_state(row: Dict, now: datetime) -> PollState:
+    return PollState(
+        next_due_at=row.get("next_due_at") or now,
+        poll_interval_seconds=row.get("poll_interval_seconds") or SCHED_DEFAULT_INTERVAL_SECONDS,
+        error_count=row.get("error_count") or 0,
+        not_modified_streak=row.get("not_modified_streak") or 0,
+        last_changed_at=row.get("last_changed_at"),
+    )
+
+
+def next_poll(
+    prev: PollState,
+    *,
+    status: Optional[int],
+    new_items: int,
+    headers: Dict[str, str],
+    now: datetime,
+) -> PollState:
+    """
+    Work out when to poll a feed next from the outcome of the poll just made.
+
+    - errors (no response, 4xx/5xx) back off exponentially from the current
+      interval without changing it; Retry-After is honoured as a floor
+    - new items pull the interval toward half the observed time between changes
+    - unchanged polls (304 or nothing new) stretch the interval from the second
+      one in a row on, so dormant feeds drift toward SCHED_MAX_INTERVAL_SECONDS
+    - Cache-Control max-age is a floor: polling earlier would only hit caches
+    """
+    interval = prev.poll_interval_seconds
+    retry_after = _retry_after(headers, now)
+
+    if status is None or status >= 400:
+        errors = prev.error_count + 1
+        delay = min(interval * 2 ** min(errors, 16), SCHED_MAX_BACKOFF_SECONDS)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, SCHED_MAX_INTERVAL_SECONDS))
+        return PollState(
+            next_due_at=now + _jittered(delay),
+            poll_interval_seconds=interval,
+            error_count=errors,
+            not_modified_streak=prev.not_modified_streak,
+            last_changed_at=prev.last_changed_at,
+        )
+
+    streak = prev.not_modified_streak
+    changed_at = prev.last_changed_at
+    if new_items > 0:
+        if changed_at is not None:
+            observed = (now - changed_at).total_seconds() / _POLLS_PER_CHANGE
+            interval = _clamp((interval + observed) / 2)
+        else:
+            interval = _clamp(interval / 2)
+        streak = 0
+        changed_at = now
+    else:
+        streak += 1
+        if streak >= 2:
+            interval = _clamp(interval * _QUIET_GROWTH)
+
+    delay = float(interval)
+    max_age = _max_age(headers)
+    if max_age is not None:
+        delay = max(delay, min(max_age, SCHED_MAX_INTERVAL_SECONDS))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, SCHED_MAX_INTERVAL_SECONDS))
+
+    return PollState(
+        next_due_at=now + _jittered(delay),
+        poll_interval_seconds=interval,
+        error_count=0,
+        not_modified_streak=streak,
+        last_changed_at=changed_at,
+    )
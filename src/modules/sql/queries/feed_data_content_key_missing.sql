@@ -0,0 +1,9 @@
+-- Items with a link but no content_key yet, in id order after the given id
+select fk.id, fk.published_dt, fd.link
+from feed_data_key fk
+join feed_data fd on fd.id = fk.id and fd.published_dt = fk.published_dt
+where fk.content_key is null
+  and fd.link <> ''
+  and fk.id > %s
+order by fk.id
+limit %s;
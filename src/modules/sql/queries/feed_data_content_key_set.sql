@@ -0,0 +1,15 @@
+with t as (
+  select *
+  from unnest(%s::bigint[], %s::timestamptz[], %s::text[], %s::text[])
+    as t(id, published_dt, sha1_hash, content_key)
+),
+keys as (
+  update feed_data_key fk
+  set sha1_hash = t.sha1_hash, content_key = t.content_key
+  from t
+  where fk.id = t.id
+)
+update feed_data fd
+set sha1_hash = t.sha1_hash, content_key = t.content_key
+from t
+where fd.id = t.id and fd.published_dt = t.published_dt;
@@ -0,0 +1 @@
+select p as partition from feed_data_drop_partitions(%s, %s) as p;
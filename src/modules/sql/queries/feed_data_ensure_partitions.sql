@@ -0,0 +1 @@
+select feed_data_ensure_partitions(%s::timestamptz[]) as created;
@@ -0,0 +1,11 @@
+-- Remove one category's items older than its cutoff (old partitions only)
+with gone as (
+  delete from feed_data fd
+  where fd.published_dt < %s
+    and fd.category = %s
+  returning fd.id, fd.feed_id
+),
+gone_keys as (
+  delete from feed_data_key fk using gone g where fk.id = g.id
+)
+select feed_id, count(*)::int as removed from gone group by feed_id;
@@ -0,0 +1,11 @@
+-- Remove items older than the default cutoff in categories without their own
+with gone as (
+  delete from feed_data fd
+  where fd.published_dt < %s
+    and fd.category <> all(%s::text[])
+  returning fd.id, fd.feed_id
+),
+gone_keys as (
+  delete from feed_data_key fk using gone g where fk.id = g.id
+)
+select feed_id, count(*)::int as removed from gone group by feed_id;
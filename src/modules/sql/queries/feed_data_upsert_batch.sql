@@ -0,0 +1,106 @@
+-- One statement per feed: unnest the column arrays, keep the last occurrence of a
+-- repeated link hash (same end state as upserting entries one by one) and drop
+-- items older than the retention cutoff. Then:
+--   * unseen hashes claim a key in feed_data_key and are inserted into feed_data
+--   * seen hashes are located through feed_data_key and updated only if their
+--     content changed (summaries compared by summary_hash); a changed
+--     published_dt moves the row to its new partition
+--   * full bodies of excerpted summaries are written to feed_data_body for new
+--     and changed rows only; search_tsv indexes the full summary either way
+with incoming as (
+  select distinct on (t.sha1_hash)
+    t.sha1_hash, t.uid, t.link, t.title, t.summary, t.published_dt, t.has_real_published,
+    t.summary_hash, t.body, t.content_key
+  from unnest(
+    %s::text[], %s::text[], %s::text[], %s::text[], %s::text[], %s::timestamptz[], %s::boolean[],
+    %s::text[], %s::text[], %s::text[]
+  ) with ordinality as t(
+    sha1_hash, uid, link, title, summary, published_dt, has_real_published, summary_hash, body,
+    content_key, ord
+  )
+  order by t.sha1_hash, t.ord desc
+),
+params as (
+  select %s::text as feed_id, %s::text as category, %s::bigint as run_id
+),
+kept as (
+  select i.*
+  from incoming i
+  where %s::timestamptz is null or i.published_dt >= %s
+),
+new_keys as (
+  insert into feed_data_key (feed_id, sha1_hash, id, published_dt, content_key)
+  select p.feed_id, k.sha1_hash, nextval(pg_get_serial_sequence('feed_data', 'id')), k.published_dt, k.content_key
+  from kept k
+  cross join params p
+  where not exists (
+    select 1 from feed_data_key fk where fk.feed_id = p.feed_id and fk.sha1_hash = k.sha1_hash
+  )
+  on conflict (feed_id, sha1_hash) do nothing
+  returning sha1_hash, id
+),
+inserted as (
+  insert into feed_data (
+    id, feed_id, category, run_id, sha1_hash, uid, link, title, summary, summary_hash,
+    published_dt, has_real_published, fetched_at, content_key, search_tsv
+  )
+  select
+    nk.id, p.feed_id, p.category, p.run_id, k.sha1_hash, k.uid, k.link, k.title, k.summary, k.summary_hash,
+    k.published_dt, k.has_real_published, now(), k.content_key,
+    feed_data_search_tsv(k.title, coalesce(k.body, k.summary))
+  from new_keys nk
+  join kept k on k.sha1_hash = nk.sha1_hash
+  cross join params p
+  returning 1
+),
+updated as (
+  update feed_data fd set
+    run_id             = p.run_id,
+    uid                = k.uid,
+    link               = k.link,
+    title              = k.title,
+    summary            = k.summary,
+    summary_hash       = k.summary_hash,
+    published_dt       = k.published_dt,
+    has_real_published = k.has_real_published,
+    fetched_at         = now(),
+    content_key        = k.content_key,
+    search_tsv         = feed_data_search_tsv(k.title, coalesce(k.body, k.summary))
+  from kept k
+  cross join params p
+  join feed_data_key fk on fk.feed_id = p.feed_id and fk.sha1_hash = k.sha1_hash
+  where fd.id = fk.id
+    and fd.published_dt = fk.published_dt
+    and (
+      fd.uid                is distinct from k.uid or
+      fd.link               is distinct from k.link or
+      fd.title              is distinct from k.title or
+      fd.summary_hash       is distinct from k.summary_hash or
+      fd.published_dt       is distinct from k.published_dt or
+      fd.has_real_published is distinct from k.has_real_published
+    )
+  returning fd.id, fd.published_dt, fd.sha1_hash
+),
+moved as (
+  update feed_data_key fk
+  set published_dt = u.published_dt
+  from updated u
+  where fk.id = u.id
+    and fk.published_dt <> u.published_dt
+),
+bodies as (
+  insert into feed_data_body (id, body)
+  select nk.id, k.body from new_keys nk join kept k on k.sha1_hash = nk.sha1_hash where k.body is not null
+  union all
+  select u.id, k.body from updated u join kept k on k.sha1_hash = u.sha1_hash where k.body is not null
+  on conflict (id) do update set body = excluded.body
+),
+bodies_gone as (
+  delete from feed_data_body b
+  using updated u
+  join kept k on k.sha1_hash = u.sha1_hash
+  where b.id = u.id and k.body is null
+)
+select
+  (select count(*) from inserted)::int as inserted,
+  (select count(*) from updated)::int  as updated;
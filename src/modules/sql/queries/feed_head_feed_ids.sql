@@ -0,0 +1 @@
+select feed_id from feed_head order by feed_id;
@@ -0,0 +1,16 @@
+insert into feed_head (feed_id, max_published_dt, max_run_id, total_items, max_hash, updated_at)
+select
+  %s,
+  max(fd.published_dt),
+  max(fd.run_id),
+  count(*),
+  max(fd.sha1_hash),
+  now()
+from feed_data fd
+where fd.feed_id = %s
+on conflict (feed_id) do update set
+  max_published_dt = excluded.max_published_dt,
+  max_run_id       = excluded.max_run_id,
+  total_items      = excluded.total_items,
+  max_hash         = excluded.max_hash,
+  updated_at       = now();
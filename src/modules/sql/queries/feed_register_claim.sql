@@ -0,0 +1,22 @@
+-- Lease up to N due feeds to one worker. Rows another worker is claiming
+-- right now are skipped rather than waited on, and feeds under a live lease
+-- are left alone; an expired lease counts as free.
+with due as (
+  select feed_id
+  from feed_register
+  where enabled = true
+    and next_due_at <= %s
+    and (lease_until is null or lease_until < now())
+  order by next_due_at
+  limit %s
+  for update skip locked
+)
+update feed_register fr set
+  lease_owner = %s,
+  lease_until = now() + make_interval(secs => %s)
+from due
+where fr.feed_id = due.feed_id
+returning
+  fr.feed_id, fr.feed_url, fr.category, fr.enabled,
+  fr.etag, fr.last_modified, fr.last_seen_published_dt, fr.feed_xml_updated_dt, fr.last_run_id, fr.body_hash,
+  fr.next_due_at, fr.poll_interval_seconds, fr.error_count, fr.not_modified_streak, fr.last_changed_at;
@@ -0,0 +1,5 @@
+-- Earliest moment any enabled feed can be claimed: its next_due_at, or the end
+-- of its lease when that is later
+select min(greatest(next_due_at, coalesce(lease_until, next_due_at))) as next_due_at
+from feed_register
+where enabled = true;
@@ -0,0 +1,16 @@
+-- Persist the scheduler's per-feed polling state for a whole batch at once
+-- and release the worker's leases on those feeds. A feed whose lease expired
+-- and was claimed by another worker keeps that worker's state.
+update feed_register fr set
+  next_due_at           = s.next_due_at,
+  poll_interval_seconds = s.poll_interval_seconds,
+  error_count           = s.error_count,
+  not_modified_streak   = s.not_modified_streak,
+  last_changed_at       = s.last_changed_at,
+  lease_owner           = null,
+  lease_until           = null
+from unnest(
+  %s::text[], %s::timestamptz[], %s::int[], %s::int[], %s::int[], %s::timestamptz[]
+) as s(feed_id, next_due_at, poll_interval_seconds, error_count, not_modified_streak, last_changed_at)
+where fr.feed_id = s.feed_id
+  and (%s::text is null or fr.lease_owner is null or fr.lease_owner = %s);
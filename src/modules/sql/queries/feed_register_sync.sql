@@ -0,0 +1,51 @@
+-- Make feed_register match feeds.csv in one statement:
+--   * new feed_ids are inserted (due immediately)
+--   * rows whose url/category/enabled differ are updated; a new url is a new
+--     document, so its conditional-GET state and body hash are dropped
+--   * enabled feeds missing from the CSV are disabled (history is kept)
+-- Unchanged rows are not written, so their etag/last_modified and poll
+-- schedule survive a deploy.
+with incoming as (
+  select distinct on (t.feed_id) t.feed_id, t.feed_url, t.category, t.enabled
+  from unnest(%s::text[], %s::text[], %s::text[], %s::boolean[])
+    with ordinality as t(feed_id, feed_url, category, enabled, ord)
+  order by t.feed_id, t.ord desc
+),
+upserted as (
+  insert into feed_register as fr (feed_id, feed_url, category, enabled, created_at, updated_at)
+  select feed_id, feed_url, category, enabled, now(), now()
+  from incoming
+  on conflict (feed_id) do update set
+    feed_url      = excluded.feed_url,
+    category      = excluded.category,
+    enabled       = excluded.enabled,
+    etag          = case when fr.feed_url = excluded.feed_url then fr.etag end,
+    last_modified = case when fr.feed_url = excluded.feed_url then fr.last_modified end,
+    body_hash     = case when fr.feed_url = excluded.feed_url then fr.body_hash end,
+    next_due_at   = case when fr.feed_url = excluded.feed_url then fr.next_due_at else now() end,
+    updated_at    = now()
+  where (fr.feed_url, fr.category, fr.enabled)
+        is distinct from (excluded.feed_url, excluded.category, excluded.enabled)
+  returning fr.feed_id, fr.category, (xmax = 0) as inserted
+),
+disabled as (
+  update feed_register fr
+  set enabled = false, updated_at = now()
+  where fr.enabled = true
+    and not exists (select 1 from incoming i where i.feed_id = fr.feed_id)
+  returning fr.feed_id
+),
+recategorized as (
+  -- keep the denormalized category on feed_data in step with the register
+  update feed_data fd
+  set category = u.category
+  from upserted u
+  where not u.inserted
+    and fd.feed_id = u.feed_id
+    and fd.category is distinct from u.category
+)
+select
+  (select count(*) from incoming)::int                    as listed,
+  (select count(*) from upserted where inserted)::int     as added,
+  (select count(*) from upserted where not inserted)::int as changed,
+  (select count(*) from disabled)::int                    as disabled;
@@ -4,5 +4,6 @@ update feed_register set
   last_seen_published_dt = %s,
   feed_xml_updated_dt    = %s,
   last_run_id            = %s,
+  body_hash              = %s,
   updated_at             = now()
 where feed_id = %s;
\ No newline at end of file
@@ -1,19 +1,28 @@
-insert into feed_register (
-  feed_id, feed_url, category, enabled,
-  etag, last_modified, last_seen_published_dt, feed_xml_updated_dt, last_run_id,
-  created_at, updated_at
-) values (
-  %s, %s, %s, %s,
-  %s, %s, %s, %s, %s,
-  now(), now()
+with registered as (
+  insert into feed_register (
+    feed_id, feed_url, category, enabled,
+    etag, last_modified, last_seen_published_dt, feed_xml_updated_dt, last_run_id,
+    created_at, updated_at
+  ) values (
+    %s, %s, %s, %s,
+    %s, %s, %s, %s, %s,
+    now(), now()
+  )
+  on conflict (feed_id) do update set
+    feed_url = excluded.feed_url,
+    category = excluded.category,
+    enabled = excluded.enabled,
+    etag = excluded.etag,
+    last_modified = excluded.last_modified,
+    last_seen_published_dt = excluded.last_seen_published_dt,
+    feed_xml_updated_dt = excluded.feed_xml_updated_dt,
+    last_run_id = excluded.last_run_id,
+    updated_at = now()
+  returning feed_id, category
 )
-on conflict (feed_id) do update set
-  feed_url = excluded.feed_url,
-  category = excluded.category,
-  enabled = excluded.enabled,
-  etag = excluded.etag,
-  last_modified = excluded.last_modified,
-  last_seen_published_dt = excluded.last_seen_published_dt,
-  feed_xml_updated_dt = excluded.feed_xml_updated_dt,
-  last_run_id = excluded.last_run_id,
-  updated_at = now();
\ No newline at end of file
+-- keep the denormalized category on feed_data in step with the register
+update feed_data fd
+set category = r.category
+from registered r
+where fd.feed_id = r.feed_id
+  and fd.category is distinct from r.category;
\ No newline at end of file
@@ -0,0 +1,11 @@
+insert into feed_run_metrics (
+  run_id, feed_id, http_status, outcome, bytes,
+  fetch_seconds, parse_seconds, db_seconds, entries_seen, entries_changed, error_class
+)
+select %s, m.*
+from unnest(
+  %s::text[], %s::int[], %s::text[], %s::int[],
+  %s::float8[], %s::float8[], %s::float8[], %s::int[], %s::int[], %s::text[]
+) as m(feed_id, http_status, outcome, bytes,
+       fetch_seconds, parse_seconds, db_seconds, entries_seen, entries_changed, error_class)
+on conflict (run_id, feed_id) do nothing;
@@ -0,0 +1,14 @@
+-- Remove feeds together with their items and head rows (bench/ cleanup).
+with gone_metrics as (
+  delete from feed_run_metrics where feed_id = any(%s::text[])
+),
+gone_items as (
+  delete from feed_data where feed_id = any(%s::text[])
+),
+gone_keys as (
+  delete from feed_data_key where feed_id = any(%s::text[])
+),
+gone_heads as (
+  delete from feed_head where feed_id = any(%s::text[])
+)
+delete from feed_register where feed_id = any(%s::text[]);
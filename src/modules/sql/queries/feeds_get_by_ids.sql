@@ -0,0 +1,8 @@
+select
+  feed_id, feed_url, category, enabled,
+  etag, last_modified, last_seen_published_dt, feed_xml_updated_dt, last_run_id, body_hash,
+  next_due_at, poll_interval_seconds, error_count, not_modified_streak, last_changed_at
+from feed_register
+where enabled = true
+  and feed_id = any(%s::text[])
+order by feed_id;
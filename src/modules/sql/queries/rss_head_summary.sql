@@ -0,0 +1,14 @@
+-- Single-row PK lookup for the request path (ETag / 304 checks).
+-- Feed-scoped tokens read feed_head; category/global tokens read scope_head.
+select fh.max_published_dt, fh.max_run_id, fh.total_items, fh.max_hash
+from feed_head fh
+join feed_register fr on fr.feed_id = fh.feed_id
+where %s::text is not null
+  and fh.feed_id = %s
+  and fr.enabled = true
+  and (%s::text is null or fr.category = %s)
+union all
+select sh.max_published_dt, sh.max_run_id, sh.total_items, sh.max_hash
+from scope_head sh
+where %s::text is null
+  and sh.scope = coalesce('cat:' || %s, '*');
@@ -1,3 +1,3 @@
-select token, label, category, feed_id, limit_default, enabled, created_at, last_used_at
+select token, label, category, feed_id, limit_default, query, full_content, enabled, created_at, last_used_at
 from rss_keys
 where token = %s and enabled = true;
\ No newline at end of file
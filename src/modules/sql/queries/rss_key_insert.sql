@@ -1,2 +1,2 @@
-insert into rss_keys (token, label, category, feed_id, limit_default, enabled, is_admin)
-values (%s, %s, %s, %s, %s, %s, %s);
\ No newline at end of file
+insert into rss_keys (token, label, category, feed_id, limit_default, query, enabled, is_admin)
+values (%s, %s, %s, %s, %s, %s, %s, %s);
\ No newline at end of file
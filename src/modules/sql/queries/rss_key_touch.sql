@@ -1,3 +0,0 @@
-update rss_keys
-set last_used_at = now()
-where token = %s;
\ No newline at end of file
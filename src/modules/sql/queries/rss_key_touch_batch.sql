@@ -0,0 +1,5 @@
+-- Write-behind flush of buffered last_used_at values, one statement per interval
+update rss_keys k
+set last_used_at = greatest(k.last_used_at, t.used_at)
+from unnest(%s::text[], %s::timestamptz[]) as t(token, used_at)
+where k.token = t.token;
@@ -0,0 +1,2 @@
+select count(*)::int as n
+from rss_keys;
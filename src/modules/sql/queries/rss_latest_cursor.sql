@@ -0,0 +1,8 @@
+-- (run_id, id) of the last row stored in the token's scope: where a delta
+-- stream with no cursor starts, so it only sends what is stored from now on.
+select fd.run_id, fd.id
+from feed_data fd
+where (%s::text is null or fd.category = %s)
+  and (%s::text is null or fd.feed_id  = %s)
+order by fd.run_id desc, fd.id desc
+limit 1;
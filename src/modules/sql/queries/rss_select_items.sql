@@ -1,11 +1,30 @@
+-- Newest-first page for a token scope. The optional (published_dt, id) cursor
+-- returns rows strictly older than it, so the scope index serves it directly.
 select
-  fd.feed_id, fd.sha1_hash, fd.uid, fd.link, fd.title, fd.summary,
+  fd.id, fd.feed_id, fd.sha1_hash, fd.uid, fd.link, fd.title,
+  -- full_content tokens get the original of an excerpted summary
+  case when %s::boolean
+    then coalesce((select b.body from feed_data_body b where b.id = fd.id), fd.summary)
+    else fd.summary
+  end as summary,
   fd.published_dt, fd.has_real_published,
-  fr.category
+  fd.category, fd.run_id
 from feed_data fd
 join feed_register fr on fr.feed_id = fd.feed_id
 where fr.enabled = true
-  and (%s::text is null or fr.category = %s)
+  and (%s::text is null or fd.category = %s)
   and (%s::text is null or fd.feed_id  = %s)
+  and (%s::text is null or fd.search_tsv @@ websearch_to_tsquery('english', %s))
+  and (%s::text is not null or fd.content_key is null or not exists (
+    -- category/global scopes show a story once: its earliest copy in scope
+    select 1
+    from feed_data_key k
+    join feed_register r on r.feed_id = k.feed_id
+    where k.content_key = fd.content_key
+      and (k.published_dt, k.id) < (fd.published_dt, fd.id)
+      and r.enabled = true
+      and (%s::text is null or r.category = %s)
+  ))
+  and (%s::timestamptz is null or (fd.published_dt, fd.id) < (%s::timestamptz, %s::bigint))
 order by fd.published_dt desc, fd.id desc
 limit %s;
\ No newline at end of file
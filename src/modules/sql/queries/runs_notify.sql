@@ -0,0 +1 @@
+select pg_notify(%s, %s);
\ No newline at end of file
@@ -1,6 +1,6 @@
 insert into runs (
-  started_at, status, feeds_attempted, feeds_ok, feeds_not_modified, feeds_failed, entries_seen, entries_inserted
+  started_at, status, worker, feeds_attempted, feeds_ok, feeds_not_modified, feeds_failed, entries_seen, entries_inserted
 ) values (
-  now(), 'Success', 0, 0, 0, 0, 0, 0
+  now(), 'Success', %s, 0, 0, 0, 0, 0, 0
 )
-returning run_id;
\ No newline at end of file
+returning run_id;
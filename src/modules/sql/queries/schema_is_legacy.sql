@@ -0,0 +1,4 @@
+-- Feed tables created before schema_version existed (the old init_db dropped
+-- and recreated them on every start, so they hold nothing worth migrating)
+select to_regclass('feed_register') is not null
+   and not exists (select 1 from schema_version) as legacy;
@@ -0,0 +1,3 @@
+select version, name, checksum
+from schema_version
+order by version;
@@ -0,0 +1,2 @@
+insert into schema_version (version, name, checksum)
+values (%s, %s, %s);
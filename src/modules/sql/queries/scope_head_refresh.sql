@@ -0,0 +1,2 @@
+-- Rebuild category and global rollups from feed_head (schema/030_worker_leases.sql)
+select scope_head_refresh();
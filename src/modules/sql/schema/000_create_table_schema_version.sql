@@ -0,0 +1,7 @@
+-- One row per applied schema/NNN_*.sql migration (see pgdao.apply_schema)
+create table if not exists schema_version (
+  version     integer primary key,
+  name        text not null,
+  checksum    text not null,                 -- sha256 of the file as applied
+  applied_at  timestamptz not null default now()
+);
@@ -1,4 +1,13 @@
 -- Drop in dependency order (children → parents)
+drop table if exists feed_run_metrics cascade;
+drop table if exists scope_head cascade;
+drop table if exists feed_head cascade;
+drop table if exists feed_data_body cascade;
+drop table if exists feed_data_key cascade;
 drop table if exists feed_data cascade;
+drop function if exists feed_data_ensure_partitions(timestamptz[]);
+drop function if exists feed_data_drop_partitions(timestamptz, boolean);
+drop function if exists scope_head_refresh();
 drop table if exists feed_register cascade;
-drop table if exists runs cascade;
\ No newline at end of file
+drop table if exists runs cascade;
+drop table if exists schema_version cascade;
\ No newline at end of file
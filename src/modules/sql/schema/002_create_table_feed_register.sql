@@ -7,7 +7,14 @@ create table if not exists feed_register (
   last_modified            text,
   last_seen_published_dt   timestamptz,
   feed_xml_updated_dt      timestamptz,      
+  body_hash                text,             -- fingerprint of the last processed body
   last_run_id              bigint references runs(run_id),
+  -- adaptive polling (scheduler.py)
+  next_due_at              timestamptz not null default now(),
+  poll_interval_seconds    integer,
+  error_count              integer not null default 0,
+  not_modified_streak      integer not null default 0,
+  last_changed_at          timestamptz,
   created_at               timestamptz not null default now(),
   updated_at               timestamptz not null default now()
 );
\ No newline at end of file
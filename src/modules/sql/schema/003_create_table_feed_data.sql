@@ -1,6 +1,10 @@
+-- Items, range-partitioned by month of published_dt (UTC). Partitions are
+-- created on demand by feed_data_ensure_partitions() and dropped by the
+-- retention job; newest-first reads only descend into recent partitions.
 create table if not exists feed_data (
-  id                bigserial primary key,
+  id                bigserial,
   feed_id           text not null references feed_register(feed_id),
+  category          text not null default '',   -- copy of feed_register.category for scope indexes
   run_id            bigint not null references runs(run_id),
   sha1_hash         text not null,
   uid               text,
@@ -9,9 +13,93 @@ create table if not exists feed_data (
   summary           text,
   published_dt      timestamptz not null,
   has_real_published boolean not null,
-  fetched_at        timestamptz not null default now()
+  fetched_at        timestamptz not null default now(),
+  -- Full-text document for q= search; titles rank above summaries
+  search_tsv        tsvector generated always as (
+                      setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                      setweight(to_tsvector('english', coalesce(summary, '')), 'B')
+                    ) stored,
+  primary key (id, published_dt)
+) partition by range (published_dt);
+
+-- Prevent duplicates per feed+link-hash. A unique constraint on a partitioned
+-- table must include the partition key, so dedup lives in this slim global
+-- table, which also locates an item's row (id, published_dt) for updates.
+create table if not exists feed_data_key (
+  feed_id           text not null references feed_register(feed_id),
+  sha1_hash         text not null,
+  id                bigint not null unique,
+  published_dt      timestamptz not null,
+  constraint uq_feed_data_unique_link primary key (feed_id, sha1_hash)
 );
 
--- Prevent duplicates per feed+link-hash
-alter table feed_data
-  add constraint uq_feed_data_unique_link unique (feed_id, sha1_hash);
\ No newline at end of file
+create index if not exists idx_feed_data_key_published
+  on feed_data_key(published_dt);
+
+-- sha1_hash is the hash of the canonical link, so it doubles as a global
+-- content key: category/global reads look up earlier copies of a story here
+create index if not exists idx_feed_data_key_content
+  on feed_data_key(sha1_hash, published_dt, id);
+
+-- Monthly partitions covering the given timestamps; returns how many were created
+create or replace function feed_data_ensure_partitions(ts timestamptz[])
+returns integer
+language plpgsql
+as $$
+declare
+  m       timestamp;
+  created integer := 0;
+  part    text;
+begin
+  for m in
+    select distinct date_trunc('month', t at time zone 'UTC') from unnest(ts) as t
+  loop
+    part := 'feed_data_' || to_char(m, 'YYYY"m"MM');
+    if to_regclass(part) is null then
+      begin
+        execute format(
+          -- percent signs doubled: the file runner parses placeholders
+          'create table %%I partition of feed_data for values from (%%L) to (%%L)',
+          part, m at time zone 'UTC', (m + interval '1 month') at time zone 'UTC'
+        );
+        created := created + 1;
+      exception when duplicate_table then
+        null;  -- another worker created it first
+      end;
+    end if;
+  end loop;
+  return created;
+end
+$$;
+
+-- Drop (or detach) every partition that ends on or before cutoff, removing its
+-- keys first; returns the affected partition names
+create or replace function feed_data_drop_partitions(cutoff timestamptz, detach boolean default false)
+returns setof text
+language plpgsql
+as $$
+declare
+  part  text;
+  lower timestamptz;
+  upper timestamptz;
+begin
+  for part in
+    select c.relname::text
+    from pg_inherits i
+    join pg_class c on c.oid = i.inhrelid
+    where i.inhparent = 'feed_data'::regclass
+    order by 1
+  loop
+    lower := to_date(right(part, 7), 'YYYY"m"MM')::timestamp at time zone 'UTC';
+    upper := (to_date(right(part, 7), 'YYYY"m"MM')::timestamp + interval '1 month') at time zone 'UTC';
+    continue when upper > cutoff;
+    delete from feed_data_key where published_dt >= lower and published_dt < upper;
+    if detach then
+      execute format('alter table feed_data detach partition %%I', part);
+    else
+      execute format('drop table %%I', part);
+    end if;
+    return next part;
+  end loop;
+end
+$$;
@@ -0,0 +1,19 @@
+-- Per-feed head summary of feed_data, refreshed by the worker after each changed feed
+create table if not exists feed_head (
+  feed_id           text primary key references feed_register(feed_id),
+  max_published_dt  timestamptz,
+  max_run_id        bigint,
+  total_items       bigint not null default 0,
+  max_hash          text,
+  updated_at        timestamptz not null default now()
+);
+
+-- Rollups over enabled feeds: 'cat:<category>' per category and '*' for everything
+create table if not exists scope_head (
+  scope             text primary key,
+  max_published_dt  timestamptz,
+  max_run_id        bigint,
+  total_items       bigint not null default 0,
+  max_hash          text,
+  updated_at        timestamptz not null default now()
+);
@@ -0,0 +1,20 @@
+-- Per-feed, per-run outcome and stage timings written by the worker at the end of each run
+create table if not exists feed_run_metrics (
+  run_id            bigint not null references runs(run_id),
+  feed_id           text not null references feed_register(feed_id),
+  http_status       integer,
+  outcome           text not null default '',   -- not-modified | same-body | xml-unchanged | unchanged | changed
+  bytes             integer not null default 0,
+  fetch_seconds     double precision not null default 0,
+  parse_seconds     double precision not null default 0,
+  db_seconds        double precision not null default 0,
+  entries_seen      integer not null default 0,
+  entries_changed   integer not null default 0,
+  error_class       text,                        -- exception class or HTTP <status>
+  recorded_at       timestamptz not null default now(),
+  primary key (run_id, feed_id)
+);
+
+-- "Which feeds are slow": recent history of one feed
+create index if not exists idx_feed_run_metrics_feed
+  on feed_run_metrics(feed_id, run_id desc);
@@ -2,6 +2,21 @@
 create index if not exists idx_feed_register_enabled
   on feed_register(enabled);
 
--- Fast latest queries
+-- Scheduler: next feeds to come due
+create index if not exists idx_feed_register_next_due
+  on feed_register(next_due_at) where enabled;
+
+-- Fast latest queries, one index per token scope; id breaks published_dt ties
+-- so keyset cursors (published_dt, id) page without OFFSET
 create index if not exists idx_feed_data_feed_published_desc
-  on feed_data(feed_id, published_dt desc);
\ No newline at end of file
+  on feed_data(feed_id, published_dt desc, id desc);
+
+create index if not exists idx_feed_data_category_published_desc
+  on feed_data(category, published_dt desc, id desc);
+
+create index if not exists idx_feed_data_published_desc
+  on feed_data(published_dt desc, id desc);
+
+-- q= search (search_tsv @@ websearch_to_tsquery('english', q))
+create index if not exists idx_feed_data_search
+  on feed_data using gin (search_tsv);
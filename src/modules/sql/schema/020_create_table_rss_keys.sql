@@ -4,10 +4,14 @@ create table if not exists rss_keys (
   category      text,
   feed_id       text,
   limit_default integer not null default 100,
+  query         text,                            -- stored q= search (websearch syntax)
   enabled       boolean not null default true,
   is_admin      boolean not null default false,  -- << this line
   created_at    timestamptz not null default now(),
   last_used_at  timestamptz
 );
 
+-- rss_keys survives 000_drop_tables; add columns introduced later
+alter table rss_keys add column if not exists query text;
+
 create index if not exists idx_rss_keys_enabled on rss_keys(enabled);
\ No newline at end of file
@@ -0,0 +1,64 @@
+-- Several workers can share feed_register: each claims due feeds by taking a
+-- lease (queries/feed_register_claim.sql) and gives it back when it stores the
+-- feed's next schedule. A lease that runs out (worker crashed or was killed)
+-- makes the feed claimable again.
+alter table feed_register
+  add column if not exists lease_owner text,
+  add column if not exists lease_until timestamptz;
+
+-- Which worker recorded a run
+alter table runs add column if not exists worker text;
+
+-- Category/global rollups, rebuilt at the end of every run. Runs from several
+-- workers overlap, so refreshes take turns: each one reads feed_head only
+-- after the previous refresh committed (plpgsql takes a new snapshot per
+-- statement) and can't overwrite newer rollups with an older view.
+create or replace function scope_head_refresh()
+returns void
+language plpgsql
+as $$
+begin
+  perform pg_advisory_xact_lock(hashtext('scope_head_refresh'));
+
+  with agg as (
+    select
+      'cat:' || fr.category     as scope,
+      max(fh.max_published_dt)  as max_published_dt,
+      max(fh.max_run_id)        as max_run_id,
+      coalesce(sum(fh.total_items), 0)::bigint as total_items,
+      max(fh.max_hash)          as max_hash
+    from feed_head fh
+    join feed_register fr on fr.feed_id = fh.feed_id
+    where fr.enabled = true
+    group by fr.category
+    union all
+    select
+      '*',
+      max(fh.max_published_dt),
+      max(fh.max_run_id),
+      coalesce(sum(fh.total_items), 0)::bigint,
+      max(fh.max_hash)
+    from feed_head fh
+    join feed_register fr on fr.feed_id = fh.feed_id
+    where fr.enabled = true
+  ),
+  upserted as (
+    insert into scope_head (scope, max_published_dt, max_run_id, total_items, max_hash, updated_at)
+    select scope, max_published_dt, max_run_id, total_items, max_hash, now()
+    from agg
+    on conflict (scope) do update set
+      max_published_dt = excluded.max_published_dt,
+      max_run_id       = excluded.max_run_id,
+      total_items      = excluded.total_items,
+      max_hash         = excluded.max_hash,
+      updated_at       = now()
+    where
+      scope_head.max_published_dt is distinct from excluded.max_published_dt or
+      scope_head.max_run_id       is distinct from excluded.max_run_id or
+      scope_head.total_items      is distinct from excluded.total_items or
+      scope_head.max_hash         is distinct from excluded.max_hash
+  )
+  delete from scope_head
+  where scope not in (select scope from agg);
+end
+$$;
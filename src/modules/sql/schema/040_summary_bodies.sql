@@ -0,0 +1,24 @@
+-- Long summaries are stored as a short excerpt in feed_data.summary (see
+-- src/modules/summary.py); the original goes to feed_data_body and is only read
+-- for tokens with full_content. summary_hash covers the original, so change
+-- detection compares hashes instead of the text.
+alter table feed_data add column if not exists summary_hash text;
+
+create table if not exists feed_data_body (
+  id    bigint primary key references feed_data_key(id) on delete cascade,
+  body  text not null
+);
+
+-- Bodies are compressed when TOASTed; use lz4 where the server supports it
+do $$
+begin
+  if exists (
+    select 1 from pg_settings
+    where name = 'default_toast_compression' and 'lz4' = any(enumvals)
+  ) then
+    alter table feed_data_body alter column body set compression lz4;
+  end if;
+end
+$$;
+
+alter table rss_keys add column if not exists full_content boolean not null default false;
@@ -0,0 +1,13 @@
+-- Published item ids (RSS guid, Atom id, JSON Feed id) are sha1_hash, the hash
+-- of the link as published, and must not change. The hash of the canonical link
+-- (src/modules/canonical.py), used to show a story once across the feeds of a
+-- category/global scope, is kept apart in content_key; linkless items have none.
+-- Rows stored before this migration get content_key (and, if they were keyed
+-- by their canonical link, their published-link sha1_hash back) from init_db.py.
+alter table feed_data add column if not exists content_key text;
+alter table feed_data_key add column if not exists content_key text;
+
+-- Earlier copies of a story are looked up here by category/global reads
+drop index if exists idx_feed_data_key_content;
+create index if not exists idx_feed_data_key_content_key
+  on feed_data_key(content_key, published_dt, id) where content_key is not null;
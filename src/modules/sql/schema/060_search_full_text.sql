@@ -0,0 +1,33 @@
+-- q= search covers the full summary, not just the stored excerpt: search_tsv
+-- was generated from feed_data.summary, which is cut to SUMMARY_MAX_CHARS since
+-- 040. It is now a plain column, written at ingest from the title and the full
+-- summary (feed_data_body.body when there is one).
+create or replace function feed_data_search_tsv(title text, summary text)
+returns tsvector
+language sql
+immutable
+as $$
+  select setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+         setweight(to_tsvector('english', coalesce(summary, '')), 'B')
+$$;
+
+alter table feed_data drop column if exists search_tsv;  -- drops idx_feed_data_search
+alter table feed_data add column search_tsv tsvector;
+
+-- summary_hash is sha256 of the full stripped summary (summary.normalize_summary);
+-- filled here for rows stored before it existed and for rows hashed with sha1,
+-- so the next fetch finds them unchanged and leaves run_id alone
+update feed_data fd
+set summary_hash = encode(sha256(convert_to(f.full_summary, 'UTF8')), 'hex'),
+    search_tsv   = feed_data_search_tsv(fd.title, f.full_summary)
+from (
+  select d.id, d.published_dt,
+         nullif(btrim(coalesce(b.body, d.summary), E' \t\n\r\f\v'), '') as full_summary
+  from feed_data d
+  left join feed_data_body b on b.id = d.id
+) f
+where f.id = fd.id
+  and f.published_dt = fd.published_dt;
+
+create index if not exists idx_feed_data_search
+  on feed_data using gin (search_tsv);
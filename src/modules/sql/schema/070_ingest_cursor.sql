@@ -0,0 +1,12 @@
+-- Delta reads (?since=, SSE) follow ingest order, not publish order: an item
+-- stored late with an old date, or re-stored because it changed, gets the
+-- current run_id and so sorts after every cursor handed out before it.
+-- One index per token scope, like the published_dt ones in 010.
+create index if not exists idx_feed_data_feed_run
+  on feed_data(feed_id, run_id, id);
+
+create index if not exists idx_feed_data_category_run
+  on feed_data(category, run_id, id);
+
+create index if not exists idx_feed_data_run
+  on feed_data(run_id, id);
@@ -0,0 +1,53 @@
+# summary.py
+import os
+import re
+import html
+import hashlib
+from typing import Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Longest summary stored as-is (characters of sanitized HTML); longer ones are
+# cut to a plain-text excerpt of this length and the original kept aside.
+# 0 stores every summary whole.
+SUMMARY_MAX_CHARS = int(os.getenv("SUMMARY_MAX_CHARS", "600"))
+
+_TAG = re.compile(r"<!--.*?-->|<[^>]*>", re.S)
+_SPACE = re.compile(r"\s+")
+
+
+def summary_text(markup: str) -> str:
+    """
+    Visible text of an HTML fragment, whitespace collapsed.
+    """
+    return _SPACE.sub(" ", html.unescape(_TAG.sub(" ", markup))).strip()
+
+
+def _excerpt(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    cut = text[: limit - 1]
+    space = cut.rfind(" ")
+    if space > limit // 2:
+        cut = cut[:space]
+    return cut.rstrip(" ,;:.-") + "…"
+
+
+def normalize_summary(markup: str, limit: int = SUMMARY_MAX_CHARS) -> Tuple[str, str, str]:
+    """
+    (display, summary_hash, body) for an already sanitized summary:
+    - display is the summary itself when it fits in limit, else a plain-text
+      excerpt of at most limit characters (HTML-escaped)
+    - summary_hash identifies the full summary (change detection)
+    - body is the full summary when display is an excerpt, else ""
+    """
+    markup = (markup or "").strip()
+    if not markup:
+        return "", "", ""
+    # sha256 so schema/060 can compute the same hash in SQL (no built-in sha1)
+    digest = hashlib.sha256(markup.encode("utf-8")).hexdigest()
+    if limit <= 0 or len(markup) <= limit:
+        return markup, digest, ""
+    return html.escape(_excerpt(summary_text(markup), limit), quote=False), digest, markup
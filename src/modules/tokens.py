@@ -0,0 +1,70 @@
+# tokens.py
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from src.modules.pgdao import rss_key_get_async, rss_key_touch_batch_async
+
+
+class TokenCache:
+    """
+    Short-TTL cache of rss_keys rows for the API, with write-behind touches.
+
+    Invalid tokens are cached too (for negative_ttl_seconds) so repeated bad
+    tokens don't reach Postgres. A token disabled in the DB keeps working for
+    at most ttl_seconds. last_used_at is buffered in memory and written by
+    flush() in one UPDATE, from a timer and at shutdown.
+    """
+
+    def __init__(self, ttl_seconds: float, negative_ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self._rows: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._touched: Dict[str, datetime] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, token: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        item = self._rows.get(token)
+        if item is not None and item[0] > now:
+            self._rows.move_to_end(token)
+            self.hits += 1
+            return item[1]
+
+        self.misses += 1
+        row = await rss_key_get_async(token)
+        ttl = self.ttl_seconds if row else self.negative_ttl_seconds
+        self._rows[token] = (now + ttl, row)
+        self._rows.move_to_end(token)
+        while len(self._rows) > self.max_entries:
+            self._rows.popitem(last=False)
+        return row
+
+    def touch(self, token: str) -> None:
+        self._touched[token] = datetime.now(timezone.utc)
+
+    async def flush(self) -> int:
+        if not self._touched:
+            return 0
+        pending, self._touched = self._touched, {}
+        try:
+            await rss_key_touch_batch_async(list(pending.keys()), list(pending.values()))
+        except Exception:
+            # keep the newest value per token for the next attempt
+            for tok, used_at in pending.items():
+                if tok not in self._touched or self._touched[tok] < used_at:
+                    self._touched[tok] = used_at
+            raise
+        return len(pending)
+
+    async def run_flusher(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.flush()
+            except Exception as exc:
+                print(f"⚠️ rss_keys touch flush failed: {exc}")
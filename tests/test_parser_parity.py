@@ -0,0 +1,224 @@
+# test_parser_parity.py
+"""
+The streaming reader must produce what feedparser would for the documents
+it accepts: same titles (entity handling), same links and summaries
+(relative URIs resolved against content-location / xml:base). Elements
+from other namespaces (itunes:, media:, dc:) must not stand in for the RSS
+or Atom ones unless feedparser would let them.
+"""
+import pytest
+
+from datetime import datetime, timezone
+
+from src.modules.parser import EntryStream, _parse_full, _Unsupported, _Waterline, parse_document
+
+BASE = "http://example.com/feed/rss.xml"
+
+RSS = b"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0"><channel>
+<title>Example</title><link>http://example.com/</link>
+<lastBuildDate>Fri, 17 Oct 2026 09:00:00 GMT</lastBuildDate>
+<item>
+  <title>AT&amp;T buys &lt;b&gt;stuff&lt;/b&gt;</title>
+  <link>http://example.com/a?x=1&amp;y=2</link>
+  <guid isPermaLink="false">item-a</guid>
+  <pubDate>Fri, 17 Oct 2026 08:00:00 GMT</pubDate>
+  <description>See &lt;a href="/about"&gt;about&lt;/a&gt; and &lt;img src="img/x.png"&gt; &amp;amp; more</description>
+</item>
+<item>
+  <title>Plain AT&amp;T &amp;amp; co</title>
+  <link>/posts/b</link>
+  <pubDate>Fri, 17 Oct 2026 07:00:00 GMT</pubDate>
+  <description><![CDATA[<p>Up <a href="../up">one</a>, <a href="//cdn.example.org/q">cdn</a>,
+    <a href="#note">note</a>, <a href="javascript:alert(1)">js</a></p><script>x()</script>]]></description>
+</item>
+<item>
+  <title><![CDATA[CDATA <i>title</i> &amp; more]]></title>
+  <guid>posts/c</guid>
+  <pubDate>Fri, 17 Oct 2026 06:00:00 GMT</pubDate>
+  <description>Tom &amp; Jerry, 1 &lt; 2</description>
+</item>
+<item>
+  <title>Fish &amp; chips &lt; 5 quid</title>
+  <link>http://example.com/d</link>
+  <pubDate>Fri, 17 Oct 2026 05:00:00 GMT</pubDate>
+  <description>no markup at all</description>
+</item>
+</channel></rss>
+"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xml:base="http://example.net/blog/">
+<title>Example</title><id>tag:example.net,2026:blog</id>
+<updated>2026-10-17T09:00:00Z</updated>
+<entry>
+  <title type="html">AT&amp;amp;T &amp;lt;b&amp;gt;</title>
+  <link href="posts/1"/>
+  <id>tag:example.net,2026:1</id>
+  <updated>2026-10-17T08:00:00Z</updated>
+  <summary type="html">&lt;a href="rel"&gt;r&lt;/a&gt; &lt;img src="/i.png"&gt; AT&amp;amp;T</summary>
+</entry>
+<entry xml:base="http://other.org/x/">
+  <title>AT&amp;T &lt;b&gt;</title>
+  <link rel="alternate" href="p2"/>
+  <link rel="enclosure" href="p2.mp3"/>
+  <id>tag:example.net,2026:2</id>
+  <updated>2026-10-17T07:00:00Z</updated>
+  <summary>text &amp; &lt;b&gt;b&lt;/b&gt;</summary>
+</entry>
+<entry>
+  <title type="text">plain</title>
+  <link href="/abs"/>
+  <id>tag:example.net,2026:3</id>
+  <published>2026-10-17T06:00:00+02:00</published>
+  <content type="html">&lt;p&gt;&lt;a href="../up"&gt;up&lt;/a&gt;&lt;/p&gt;</content>
+</entry>
+</feed>
+"""
+
+RDF = b"""<?xml version="1.0" encoding="utf-8"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns="http://purl.org/rss/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel rdf:about="http://example.org/">
+  <title>Example</title><link>http://example.org/</link>
+  <dc:date>2026-10-17T09:00:00Z</dc:date>
+</channel>
+<item rdf:about="http://example.org/1">
+  <title>AT&amp;T &lt;b&gt;x&lt;/b&gt;</title>
+  <link>http://example.org/1</link>
+  <description>&lt;a href="/z"&gt;z&lt;/a&gt; &amp;amp; &lt;img src="pic.gif"&gt;</description>
+  <dc:date>2026-10-17T08:00:00Z</dc:date>
+</item>
+<item rdf:about="http://example.org/2">
+  <title>Q&amp;A</title>
+  <link>2</link>
+  <description>plain</description>
+  <dc:date>2026-10-17T07:00:00Z</dc:date>
+</item>
+</rdf:RDF>
+"""
+
+
+@pytest.mark.parametrize("body", [RSS, ATOM, RDF], ids=["rss", "atom", "rdf"])
+@pytest.mark.parametrize("base", [BASE, ""], ids=["content-location", "no-base"])
+def test_stream_matches_feedparser(body, base):
+    headers = {"content-location": base} if base else {}
+    full = _parse_full(body, headers, _Waterline(None, 0))
+    stream = EntryStream(body, _Waterline(None, 0), base)
+    entries = list(stream)
+
+    assert stream.xml_updated_dt == full.xml_updated_dt
+    assert len(entries) == len(full.entries) > 0
+    for got, want in zip(entries, full.entries):
+        assert got == want
+
+
+def test_rss_title_entities_follow_feedparser():
+    (first, second, *_) = EntryStream(RSS, _Waterline(None, 0), BASE)
+    assert first[1] == "AT&amp;T buys <b>stuff</b>"
+    assert second[1] == "Plain AT&amp;T &amp; co"
+
+
+def test_relative_uris_resolved():
+    (first, second, *_) = EntryStream(RSS, _Waterline(None, 0), BASE)
+    assert 'href="http://example.com/about"' in first[5]
+    assert 'src="http://example.com/feed/img/x.png"' in first[5]
+    assert second[2] == "http://example.com/posts/b"
+
+    entries = list(EntryStream(ATOM, _Waterline(None, 0), BASE))
+    assert [e[2] for e in entries] == [
+        "http://example.net/blog/posts/1",
+        "http://other.org/x/p2",
+        "http://example.net/abs",
+    ]
+
+
+NS_ITEM = """<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0" xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"
+     xmlns:media="http://search.yahoo.com/mrss/" xmlns:dc="http://purl.org/dc/elements/1.1/"
+     xmlns:content="http://purl.org/rss/1.0/modules/content/" xmlns:atom="http://www.w3.org/2005/Atom">
+<channel><title>Example</title>
+<item>
+  {}
+  <link>http://example.com/ep1</link>
+</item>
+</channel></rss>
+"""
+DATED = "<pubDate>Fri, 17 Oct 2026 08:00:00 GMT</pubDate>"
+
+
+# streamed: read by EntryStream itself, else handed to feedparser
+@pytest.mark.parametrize(
+    "inner, streamed",
+    [
+        (f"<itunes:title>Episode 1</itunes:title><title>Show: Episode 1</title>{DATED}", True),
+        (f"<title>Show</title><itunes:subtitle>sub</itunes:subtitle><description>d</description>{DATED}", True),
+        (f"<title>t</title><content:encoded>&lt;p&gt;full&lt;/p&gt;</content:encoded><description>d</description>{DATED}", True),
+        ("<title>t</title><description>d</description><dc:date>2026-10-17T08:00:00Z</dc:date>", True),
+        (f"<title>t</title><itunes:summary>short</itunes:summary><description>long</description>{DATED}", False),
+        (f"<media:title>MT</media:title><title>t</title>{DATED}", False),
+        (f"<dc:title>DT</dc:title><title>t</title>{DATED}", False),
+        (f"<title>t</title><dc:description>dd</dc:description><description>d</description>{DATED}", False),
+        (f'<atom:link href="http://example.com/other"/><title>t</title>{DATED}', False),
+    ],
+    ids=[
+        "itunes_title_first", "itunes_subtitle", "content_encoded_first", "dc_date",
+        "itunes_summary_first", "media_title_first", "dc_title_first", "dc_description_first",
+        "atom_link_in_rss",
+    ],
+)
+def test_namespaced_children_follow_feedparser(inner, streamed):
+    body = NS_ITEM.format(inner).encode("utf-8")
+    want = _parse_full(body, {}, _Waterline(None, 0)).entries
+    assert parse_document(body, {}).entries == want
+    if streamed:
+        assert list(EntryStream(body, _Waterline(None, 0))) == want
+    else:
+        with pytest.raises(_Unsupported):
+            list(EntryStream(body, _Waterline(None, 0)))
+
+
+# --- waterline stop ---
+
+
+def _dated(*days):
+    """RSS with one item per day of October 2026 (None: undated), in the given order."""
+    items = "".join(
+        f"<item><title>{f'd{d}' if d else 'undated'}</title><link>http://example.com/{i}</link>"
+        + (f"<pubDate>{d:02d} Oct 2026 08:00:00 GMT</pubDate>" if d else "")
+        + "</item>"
+        for i, d in enumerate(days)
+    )
+    return f"<rss version='2.0'><channel><title>x</title>{items}</channel></rss>".encode("utf-8")
+
+
+WATERLINE = datetime(2026, 10, 7, 8, 0, tzinfo=timezone.utc)
+
+
+def _read(body, stop_after):
+    stream = EntryStream(body, _Waterline(WATERLINE, stop_after))
+    titles = [e[1] for e in stream]
+    full = _parse_full(body, {}, _Waterline(WATERLINE, stop_after))
+    assert full.stopped_early == stream.stopped_early
+    assert [e[1] for e in full.entries] == titles
+    return titles, stream.stopped_early
+
+
+def test_waterline_stops_after_consecutive_items():
+    # 7 is at the waterline, 6 below: two in a row
+    assert _read(_dated(10, 9, 8, 7, 6, 5, 4), 2) == (["d10", "d9", "d8", "d7", "d6"], True)
+    assert _read(_dated(10, 9, 8, 7, 6, 5, 4), 0) == ([f"d{d}" for d in (10, 9, 8, 7, 6, 5, 4)], False)
+
+
+def test_waterline_streak_reset_by_undated_items():
+    titles, stopped = _read(_dated(10, 7, None, 6, 5, 4), 2)
+    assert titles == ["d10", "d7", "undated", "d6", "d5"]
+    assert stopped
+
+
+def test_waterline_off_for_oldest_first_feeds():
+    days = (3, 4, 5, 6, 7, 8, 9)
+    titles, stopped = _read(_dated(*days), 2)
+    assert titles == [f"d{d}" for d in days]
+    assert not stopped
+